@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User, ServiceProvider, ProviderExperience
+from .models import User, ServiceProvider, ProviderExperience, AvailabilityRule, AvailabilityException
 from searching.models import Service
 
 
@@ -29,3 +29,15 @@ class ProviderExperienceAdmin(admin.ModelAdmin):
     list_display = ("experience_name", "service_provider", "experience_company")
     search_fields = ("experience_name", "experience_company")
     list_filter = ("experience_categories",)
+
+
+@admin.register(AvailabilityRule)
+class AvailabilityRuleAdmin(admin.ModelAdmin):
+    list_display = ("provider", "start_time", "end_time", "valid_from", "valid_until")
+    search_fields = ("provider__user__email",)
+
+
+@admin.register(AvailabilityException)
+class AvailabilityExceptionAdmin(admin.ModelAdmin):
+    list_display = ("provider", "start_time", "end_time", "reason")
+    search_fields = ("provider__user__email",)
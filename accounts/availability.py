@@ -0,0 +1,299 @@
+"""
+Disponibilidad de proveedores.
+
+Hay tres fuentes: horarios puntuales (Availability), reglas semanales
+(AvailabilityRule) y excepciones (AvailabilityException). `provider_slots`
+es la única forma de obtener las franjas efectivas de una ventana: expande
+las reglas solo para esa ventana, fusiona todo con un barrido sobre los
+intervalos ordenados y resta las excepciones. La búsqueda y las reservas
+usan esta API (directamente o vía `available_provider_ids`/`is_available`).
+
+Los horarios puntuales fusionados se guardan además en AvailabilityBucket
+una vez por cada hora que cubren, para que la búsqueda por ventana sea una
+consulta por índice.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Availability, AvailabilityBucket, AvailabilityException, AvailabilityRule, ServiceProvider
+
+BUCKET_SECONDS = 3600
+
+
+def merge_intervals(intervals):
+    """
+    Fusiona intervalos (start, end) solapados o contiguos con un barrido
+    sobre la lista ordenada por inicio.
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def bucket_of(moment):
+    """
+    Número de bucket (horas desde el epoch UTC) que contiene `moment`.
+    """
+    return int(moment.astimezone(dt_timezone.utc).timestamp() // BUCKET_SECONDS)
+
+
+def bucket_rows(provider_id, intervals):
+    """
+    Filas de AvailabilityBucket para los intervalos fusionados de un proveedor.
+    """
+    return [
+        AvailabilityBucket(provider_id=provider_id, bucket=bucket, start_time=start, end_time=end)
+        for start, end in intervals
+        for bucket in range(bucket_of(start), bucket_of(end) + 1)
+    ]
+
+
+def rebuild_provider_index(provider_id):
+    """
+    Recalcula los buckets de un proveedor a partir de sus horarios.
+    """
+    intervals = merge_intervals(
+        Availability.objects.filter(provider_id=provider_id).values_list('start_time', 'end_time')
+    )
+    with transaction.atomic():
+        AvailabilityBucket.objects.filter(provider_id=provider_id).delete()
+        AvailabilityBucket.objects.bulk_create(bucket_rows(provider_id, intervals), batch_size=500)
+
+
+def ensure_aware(moment):
+    """
+    Interpreta los datetimes sin zona (p. ej. de un input datetime-local) en
+    la zona horaria actual.
+    """
+    if timezone.is_naive(moment):
+        return timezone.make_aware(moment)
+    return moment
+
+
+def subtract_intervals(intervals, holes):
+    """
+    Resta los intervalos `holes` de `intervals`; ambos fusionados y ordenados.
+    """
+    result = []
+    hole_index = 0
+    for start, end in intervals:
+        while hole_index < len(holes) and holes[hole_index][1] <= start:
+            hole_index += 1
+        position = hole_index
+        while position < len(holes) and holes[position][0] < end:
+            hole_start, hole_end = holes[position]
+            if hole_start > start:
+                result.append((start, hole_start))
+            start = max(start, hole_end)
+            position += 1
+        if start < end:
+            result.append((start, end))
+    return result
+
+
+def local_days(start, end):
+    """
+    Fechas locales que toca la ventana, empezando el día anterior para
+    incluir las franjas nocturnas que empiezan antes de medianoche.
+    """
+    day = timezone.localtime(start).date() - timedelta(days=1)
+    last = timezone.localtime(end).date()
+    while day <= last:
+        yield day
+        day += timedelta(days=1)
+
+
+def expand_rule(rule, start, end):
+    """
+    Franjas concretas de una regla que se solapan con [start, end].
+    """
+    zone = timezone.get_current_timezone()
+    for day in local_days(start, end):
+        if not rule.applies_on(day) or day < rule.valid_from:
+            continue
+        if rule.valid_until and day > rule.valid_until:
+            continue
+        slot_start = timezone.make_aware(datetime.combine(day, rule.start_time), zone)
+        end_day = day if rule.end_time > rule.start_time else day + timedelta(days=1)
+        slot_end = timezone.make_aware(datetime.combine(end_day, rule.end_time), zone)
+        if slot_start < end and slot_end > start:
+            yield slot_start, slot_end
+
+
+def weekday_mask(start, end):
+    """
+    Máscara de los días de la semana que toca la ventana (ver local_days).
+    """
+    mask = 0
+    for day in local_days(start, end):
+        mask |= 1 << day.weekday()
+        if mask == 0b1111111:
+            break
+    return mask
+
+
+def active_rules(start, end):
+    """
+    Reglas que pueden aportar franjas a la ventana, filtradas en SQL por
+    vigencia y días de la semana.
+    """
+    first_day = timezone.localtime(start).date() - timedelta(days=1)
+    last_day = timezone.localtime(end).date()
+    return AvailabilityRule.objects.alias(
+        matching_days=F('weekdays').bitand(weekday_mask(start, end)),
+    ).filter(
+        Q(valid_until__isnull=True) | Q(valid_until__gte=first_day),
+        valid_from__lte=last_day,
+        matching_days__gt=0,
+    )
+
+
+def provider_slots(provider_ids, start, end):
+    """
+    Franjas efectivas de cada proveedor que se solapan con [start, end]:
+    horarios puntuales y reglas expandidas, fusionados, menos las
+    excepciones. Devuelve {provider_id: [(inicio, fin), ...]} en tres consultas.
+    """
+    start, end = ensure_aware(start), ensure_aware(end)
+    provider_ids = list(provider_ids)
+    intervals = defaultdict(list)
+    one_off = Availability.objects.filter(
+        provider_id__in=provider_ids, start_time__lt=end, end_time__gt=start,
+    ).values_list('provider_id', 'start_time', 'end_time')
+    for provider_id, slot_start, slot_end in one_off:
+        intervals[provider_id].append((slot_start, slot_end))
+    for rule in active_rules(start, end).filter(provider_id__in=provider_ids):
+        intervals[rule.provider_id].extend(expand_rule(rule, start, end))
+
+    holes = defaultdict(list)
+    exceptions = AvailabilityException.objects.filter(
+        provider_id__in=provider_ids, start_time__lt=end, end_time__gt=start,
+    ).values_list('provider_id', 'start_time', 'end_time')
+    for provider_id, hole_start, hole_end in exceptions:
+        holes[provider_id].append((hole_start, hole_end))
+
+    return {
+        provider_id: subtract_intervals(merge_intervals(intervals[provider_id]), merge_intervals(holes[provider_id]))
+        for provider_id in provider_ids
+    }
+
+
+def covers(slots, start, end):
+    return any(slot_start <= start and slot_end >= end for slot_start, slot_end in slots)
+
+
+def has_availability(provider_id):
+    """
+    Indica si el proveedor ha publicado algún horario o regla semanal.
+    """
+    return (
+        Availability.objects.filter(provider_id=provider_id).exists()
+        or AvailabilityRule.objects.filter(provider_id=provider_id).exists()
+    )
+
+
+def is_available(provider_id, start, end):
+    """
+    Indica si una franja efectiva del proveedor contiene toda la ventana.
+    """
+    start, end = ensure_aware(start), ensure_aware(end)
+    return covers(provider_slots([provider_id], start, end)[provider_id], start, end)
+
+
+def compare_local(day, field, lookup, moment):
+    """
+    Condición SQL de "combine(day, <field>) <lookup> moment" en hora local,
+    para un campo TimeField de la regla. Devuelve Q() si se cumple siempre y
+    None si nunca.
+    """
+    local = timezone.localtime(moment)
+    if day == local.date():
+        return Q(**{f'{field}__{lookup}': local.time().replace(tzinfo=None)})
+    holds = day < local.date() if lookup in ('lt', 'lte') else day > local.date()
+    return Q() if holds else None
+
+
+def rule_slot_matches(start, end, covering):
+    """
+    Condición SQL sobre AvailabilityRule: alguna franja de la regla en la
+    ventana la contiene por completo (`covering`) o se solapa con ella.
+    Usa los alias day_<n> de `rules_in_window`.
+    """
+    condition = Q(pk__in=[])
+    for position, day in enumerate(local_days(start, end)):
+        if covering:
+            starts_ok = compare_local(day, 'start_time', 'lte', start)
+        else:
+            starts_ok = compare_local(day, 'start_time', 'lt', end)
+        if starts_ok is None:
+            continue
+        on_day = Q(**{f'day_{position}__gt': 0}, valid_from__lte=day) & (
+            Q(valid_until__isnull=True) | Q(valid_until__gte=day)
+        )
+        # Franja del mismo día o, si end_time <= start_time, hasta el día siguiente.
+        for same_day, end_day in ((True, day), (False, day + timedelta(days=1))):
+            if covering:
+                ends_ok = compare_local(end_day, 'end_time', 'gte', end)
+            else:
+                ends_ok = compare_local(end_day, 'end_time', 'gt', start)
+            if ends_ok is None:
+                continue
+            shape = Q(end_time__gt=F('start_time')) if same_day else Q(end_time__lte=F('start_time'))
+            condition |= on_day & starts_ok & ends_ok & shape
+    return condition
+
+
+def rules_in_window(start, end, covering):
+    aliases = {
+        f'day_{position}': F('weekdays').bitand(1 << day.weekday())
+        for position, day in enumerate(local_days(start, end))
+    }
+    return AvailabilityRule.objects.alias(**aliases).filter(rule_slot_matches(start, end, covering))
+
+
+def available_provider_ids(start, end):
+    """
+    Subconsulta con los ids de proveedores con una franja efectiva que
+    contiene por completo la ventana [start, end]. Los horarios puntuales se
+    resuelven con el índice de buckets y las reglas que la cubren solas, en
+    SQL. Solo los proveedores que necesitan combinar franjas (una regla que
+    se solapa sin cubrir la ventana) se expanden en Python.
+    """
+    start, end = ensure_aware(start), ensure_aware(end)
+    in_buckets = AvailabilityBucket.objects.filter(
+        bucket=bucket_of(start),
+        start_time__lte=start,
+        end_time__gte=end,
+    ).values('provider_id')
+    by_rule = rules_in_window(start, end, covering=True).values('provider_id')
+    # Cualquier excepción dentro de la ventana impide cubrirla por completo.
+    blocked = AvailabilityException.objects.filter(start_time__lt=end, end_time__gt=start).values('provider_id')
+
+    partial = set(
+        rules_in_window(start, end, covering=False)
+        .exclude(provider_id__in=in_buckets)
+        .exclude(provider_id__in=by_rule)
+        .exclude(provider_id__in=blocked)
+        .values_list('provider_id', flat=True)
+    )
+    combined = []
+    if partial:
+        slots = provider_slots(partial, start, end)
+        combined = [provider_id for provider_id in partial if covers(slots[provider_id], start, end)]
+
+    return (
+        ServiceProvider.objects
+        .filter(Q(pk__in=in_buckets) | Q(pk__in=by_rule) | Q(pk__in=combined))
+        .exclude(pk__in=blocked)
+        .values('pk')
+    )
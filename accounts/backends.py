@@ -0,0 +1,16 @@
+from django.contrib.auth.backends import ModelBackend
+
+from .cache import get_cached_user
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend que lee el usuario de la sesión desde la caché en lugar de
+    consultarlo en cada petición.
+    """
+
+    def get_user(self, user_id):
+        user = get_cached_user(user_id)
+        if user is None or not self.user_can_authenticate(user):
+            return None
+        return user
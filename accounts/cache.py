@@ -0,0 +1,61 @@
+"""
+Caché de lo que se lee en cada petición autenticada: el usuario de la
+sesión y su perfil de proveedor.
+
+Ambos se guardan por id de usuario y se invalidan con las señales de
+accounts/signals.py al guardar o borrar el usuario o el perfil. Los UPDATE
+masivos no envían señales: quien los hace debe llamar a `invalidate_user`
+(ver interactions/ratings.py).
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import ServiceProvider, User
+
+USER_KEY = "auth:user:{}"
+PROVIDER_KEY = "auth:provider:{}"
+
+# Marca en caché a los usuarios sin perfil de proveedor, para no consultarlo en cada petición.
+NO_PROVIDER = 0
+
+
+def cache_timeout():
+    return getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 300)
+
+
+def get_cached_user(user_id):
+    """
+    Usuario con id `user_id`, o None si no existe.
+    """
+    try:
+        user_id = User._meta.pk.to_python(user_id)
+    except Exception:
+        return None
+    key = USER_KEY.format(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = User.objects.filter(pk=user_id).first()
+        if user is not None:
+            cache.set(key, user, cache_timeout())
+    return user
+
+
+def get_provider_profile(user):
+    """
+    Perfil de proveedor del usuario, o None si no tiene. El perfil devuelto
+    ya tiene asignado `user`, sin otra consulta.
+    """
+    key = PROVIDER_KEY.format(user.pk)
+    provider = cache.get(key)
+    if provider is None:
+        provider = ServiceProvider.objects.filter(user_id=user.pk).first() or NO_PROVIDER
+        cache.set(key, provider, cache_timeout())
+    if provider == NO_PROVIDER:
+        return None
+    provider.user = user
+    return provider
+
+
+def invalidate_user(user_id):
+    cache.delete_many([USER_KEY.format(user_id), PROVIDER_KEY.format(user_id)])
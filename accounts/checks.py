@@ -0,0 +1,39 @@
+"""
+Comprobaciones de configuración de la app.
+"""
+
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Backends de caché que no se comparten entre procesos.
+PROCESS_LOCAL_CACHES = {"django.core.cache.backends.locmem.LocMemCache"}
+
+CACHED_SESSION_ENGINES = {
+    "django.contrib.sessions.backends.cache",
+    "django.contrib.sessions.backends.cached_db",
+}
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Las sesiones en caché y el usuario cacheado (accounts/cache.py) necesitan
+    una caché compartida: con una caché por proceso, un cierre de sesión, un
+    cambio de contraseña o una desactivación en un worker no se verían en
+    los demás hasta que expirara la entrada.
+    """
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    uses = []
+    if settings.SESSION_ENGINE in CACHED_SESSION_ENGINES:
+        uses.append(f"SESSION_ENGINE = {settings.SESSION_ENGINE!r}")
+    if "accounts.backends.CachedModelBackend" in settings.AUTHENTICATION_BACKENDS:
+        uses.append("accounts.backends.CachedModelBackend")
+    if not uses:
+        return []
+    return [Error(
+        f"La caché por defecto ({backend}) no se comparte entre procesos y la usan {', '.join(uses)}.",
+        hint="Configura una caché compartida en CACHES['default'] (Redis, Memcached o FileBasedCache).",
+        id="accounts.E001",
+    )]
@@ -4,7 +4,7 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.core.exceptions import ValidationError
 from datetime import date
-from .models import User, ServiceProvider, Availability
+from .models import User, ServiceProvider, Availability, AvailabilityRule, AvailabilityException
 
 class CustomUserCreationForm(UserCreationForm):
     """
@@ -187,4 +187,55 @@ class AvailabilityForm(forms.ModelForm):
         widgets = {
             'start_time': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
             'end_time': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
-        }
\ No newline at end of file
+        }
+
+class AvailabilityRuleForm(forms.ModelForm):
+    days = forms.TypedMultipleChoiceField(
+        choices=AvailabilityRule.WEEKDAY_CHOICES,
+        coerce=int,
+        widget=forms.CheckboxSelectMultiple,
+        label="Días",
+    )
+
+    class Meta:
+        model = AvailabilityRule
+        fields = ['start_time', 'end_time', 'valid_from', 'valid_until']
+        widgets = {
+            'start_time': forms.TimeInput(attrs={'type': 'time'}),
+            'end_time': forms.TimeInput(attrs={'type': 'time'}),
+            'valid_from': forms.DateInput(attrs={'type': 'date'}),
+            'valid_until': forms.DateInput(attrs={'type': 'date'}),
+        }
+
+    def clean(self):
+        cleaned_data = super().clean()
+        valid_from, valid_until = cleaned_data.get('valid_from'), cleaned_data.get('valid_until')
+        if valid_from and valid_until and valid_until < valid_from:
+            raise ValidationError("La fecha final debe ser posterior a la inicial.", code='invalid_range')
+        if cleaned_data.get('start_time') and cleaned_data.get('start_time') == cleaned_data.get('end_time'):
+            raise ValidationError("La hora de inicio y la de fin no pueden ser iguales.", code='empty_slot')
+        return cleaned_data
+
+    def save(self, commit=True):
+        rule = super().save(commit=False)
+        rule.weekdays = sum(1 << day for day in self.cleaned_data['days'])
+        if commit:
+            rule.save()
+        return rule
+
+
+class AvailabilityExceptionForm(forms.ModelForm):
+    class Meta:
+        model = AvailabilityException
+        fields = ['start_time', 'end_time', 'reason']
+        widgets = {
+            'start_time': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
+            'end_time': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
+        }
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_time, end_time = cleaned_data.get('start_time'), cleaned_data.get('end_time')
+        if start_time and end_time and end_time <= start_time:
+            raise ValidationError("La hora de fin debe ser posterior a la de inicio.", code='invalid_range')
+        return cleaned_data
@@ -0,0 +1,199 @@
+"""
+Geolocalización local (sin servicios externos) para el área metropolitana
+de Medellín.
+
+Las coordenadas de un usuario se derivan de `user_address` buscando en ella
+el nombre de un barrio o comuna de la tabla de centroides; si no aparece
+ninguno se usa el centroide del municipio. Las coordenadas se indexan con
+geohash para responder búsquedas por radio con rangos sobre un índice.
+"""
+
+import math
+import re
+import unicodedata
+
+import numpy as np
+
+# Centroides aproximados de municipios (lat, lon).
+CITY_CENTROIDS = {
+    "medellin": (6.2476, -75.5658),
+    "envigado": (6.1700, -75.5870),
+    "bello": (6.3370, -75.5580),
+    "sabaneta": (6.1510, -75.6160),
+    "itagui": (6.1720, -75.6110),
+    "la_estrella": (6.1580, -75.6430),
+    "caldas": (6.0910, -75.6350),
+    "copacabana": (6.3480, -75.5090),
+    "girardota": (6.3770, -75.4460),
+    "barbosa": (6.4390, -75.3310),
+}
+
+# Centroides aproximados de barrios y comunas, por municipio.
+NEIGHBORHOOD_CENTROIDS = {
+    "medellin": {
+        "la candelaria": (6.2476, -75.5658),
+        "el centro": (6.2476, -75.5658),
+        "el poblado": (6.2086, -75.5659),
+        "provenza": (6.2080, -75.5670),
+        "milla de oro": (6.2000, -75.5740),
+        "el tesoro": (6.1990, -75.5570),
+        "laureles": (6.2447, -75.5969),
+        "estadio": (6.2527, -75.5903),
+        "conquistadores": (6.2470, -75.5860),
+        "calasanz": (6.2590, -75.6010),
+        "la floresta": (6.2570, -75.6070),
+        "la america": (6.2530, -75.6050),
+        "belen": (6.2307, -75.6030),
+        "guayabal": (6.2180, -75.5850),
+        "san javier": (6.2560, -75.6180),
+        "robledo": (6.2780, -75.5960),
+        "castilla": (6.2940, -75.5720),
+        "doce de octubre": (6.3050, -75.5800),
+        "aranjuez": (6.2810, -75.5550),
+        "manrique": (6.2750, -75.5480),
+        "popular": (6.2980, -75.5470),
+        "santa cruz": (6.2950, -75.5560),
+        "villa hermosa": (6.2560, -75.5470),
+        "buenos aires": (6.2390, -75.5510),
+        "boston": (6.2480, -75.5550),
+        "prado": (6.2590, -75.5630),
+    },
+    "envigado": {
+        "zuniga": (6.1840, -75.5830),
+        "el portal": (6.1770, -75.5890),
+        "la magnolia": (6.1690, -75.5830),
+        "el dorado": (6.1650, -75.5800),
+    },
+    "bello": {
+        "niquia": (6.3380, -75.5450),
+        "cabanas": (6.3280, -75.5630),
+        "la madera": (6.3300, -75.5550),
+        "paris": (6.3240, -75.5600),
+    },
+    "itagui": {
+        "ditaires": (6.1810, -75.6090),
+        "santa maria": (6.1890, -75.5980),
+        "san pio": (6.1700, -75.6140),
+    },
+    "sabaneta": {
+        "aves maria": (6.1480, -75.6090),
+        "las lomitas": (6.1440, -75.6150),
+    },
+}
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9
+# Carácter mayor que cualquier símbolo del alfabeto, para convertir un
+# prefijo en el rango [prefijo, prefijo + GEOHASH_UPPER).
+GEOHASH_UPPER = "{"
+# Máximo de celdas (un rango del índice cada una) para cubrir un círculo.
+MAX_COVERING_CELLS = 49
+
+
+def normalize_text(text):
+    """
+    Minúsculas, sin tildes y con espacios simples.
+    """
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+def locate_address(address, city):
+    """
+    Coordenadas (lat, lon) de una dirección: el barrio más específico que
+    aparezca en ella o, si no hay ninguno, el centroide del municipio.
+    """
+    normalized = f" {normalize_text(address)} "
+    best = None
+    for name, coordinates in NEIGHBORHOOD_CENTROIDS.get(city, {}).items():
+        if f" {name} " in normalized and (best is None or len(name) > len(best[0])):
+            best = (name, coordinates)
+    if best:
+        return best[1]
+    return CITY_CENTROIDS.get(city)
+
+
+def geohash_encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    bits, bit_count, even = 0, 0, True
+    result = []
+    while len(result) < precision:
+        value, bounds = (longitude, lon_range) if even else (latitude, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        if value >= middle:
+            bits = (bits << 1) | 1
+            bounds[0] = middle
+        else:
+            bits <<= 1
+            bounds[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            result.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+    return "".join(result)
+
+
+def cell_size_degrees(precision):
+    """
+    Alto y ancho (en grados) de una celda geohash de la precisión dada.
+    """
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def covering_steps(precision, radius_km, cos_lat):
+    """
+    Anillos de celdas vecinas (en latitud y en longitud) necesarios para
+    llegar a `radius_km` desde la celda del punto.
+    """
+    height, width = cell_size_degrees(precision)
+    return (
+        math.ceil(radius_km / (height * KM_PER_DEGREE)),
+        math.ceil(radius_km / (width * KM_PER_DEGREE * cos_lat)),
+    )
+
+
+def covering_prefixes(latitude, longitude, radius_km):
+    """
+    Prefijos geohash que cubren el círculo de búsqueda: la celda que
+    contiene el punto y los anillos de vecinas necesarios para llegar a
+    `radius_km` en cada dirección. Se usa la precisión más fina que no pase
+    de MAX_COVERING_CELLS celdas (unas r/2 de lado), así que el área leída
+    crece con el círculo y no con la ciudad.
+    """
+    # El ancho de las celdas se mide en el borde del círculo más alejado
+    # del ecuador, donde los grados de longitud son más cortos.
+    farthest_lat = min(abs(latitude) + radius_km / KM_PER_DEGREE, 90.0)
+    cos_lat = max(math.cos(math.radians(farthest_lat)), 0.01)
+    precision = 1
+    for candidate in range(GEOHASH_PRECISION, 0, -1):
+        lat_steps, lon_steps = covering_steps(candidate, radius_km, cos_lat)
+        if (2 * lat_steps + 1) * (2 * lon_steps + 1) <= MAX_COVERING_CELLS:
+            precision = candidate
+            break
+    height, width = cell_size_degrees(precision)
+    lat_steps, lon_steps = covering_steps(precision, radius_km, cos_lat)
+    prefixes = set()
+    for lat_step in range(-lat_steps, lat_steps + 1):
+        for lon_step in range(-lon_steps, lon_steps + 1):
+            lat = min(max(latitude + lat_step * height, -90.0), 90.0)
+            lon = (longitude + lon_step * width + 180.0) % 360.0 - 180.0
+            prefixes.add(geohash_encode(lat, lon, precision))
+    return sorted(prefixes)
+
+
+def haversine_km(latitude, longitude, latitudes, longitudes):
+    """
+    Distancia en km desde un punto a arrays (NumPy) de coordenadas.
+    """
+    lat1, lon1 = math.radians(latitude), math.radians(longitude)
+    lat2, lon2 = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
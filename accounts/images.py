@@ -0,0 +1,167 @@
+"""
+Miniaturas de las fotos de perfil.
+
+Por cada foto se generan recortes cuadrados de tamaño fijo, en JPEG y en
+WebP, junto al original: profiles/foo.jpg -> profiles/thumbs/foo_64.jpg y
+profiles/thumbs/foo_64.webp. La generación corre en un pool de hilos
+después del commit, para que el registro y la edición del perfil no
+esperen a Pillow. Mientras una variante no exista se sirve el original.
+
+Al terminar, el nombre de la foto se guarda en `<campo>_thumbs` del modelo
+(p. ej. User.user_picture_thumbs), así que al renderizar no se consulta el
+storage. Ese guardado dispara las señales que invalidan el usuario en caché
+y el perfil renderizado del proveedor.
+"""
+
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Lado en píxeles de cada tamaño; el doble del tamaño mostrado, para pantallas de alta densidad.
+THUMBNAIL_SIZES = {
+    "sm": 64,
+    "md": 128,
+    "lg": 256,
+}
+
+FORMATS = {
+    "jpg": ("JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+    "webp": ("WEBP", {"quality": 80, "method": 6}),
+}
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "IMAGE_PIPELINE_WORKERS", 2),
+            thread_name_prefix="thumbnails",
+        )
+    return _executor
+
+
+def variant_name(name, size, extension):
+    """
+    Nombre en el storage de una variante de la imagen `name`.
+    """
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, "thumbs", f"{stem}_{THUMBNAIL_SIZES[size]}.{extension}")
+
+
+def variant_names(name):
+    return [
+        variant_name(name, size, extension)
+        for size in THUMBNAIL_SIZES
+        for extension in FORMATS
+    ]
+
+
+def has_variants(storage, name):
+    return all(storage.exists(variant) for variant in variant_names(name))
+
+
+def generate_variants(storage, name, force=False):
+    """
+    Genera todas las variantes de una imagen. Devuelve cuántas escribió.
+    """
+    if not force and has_variants(storage, name):
+        return 0
+    with storage.open(name, "rb") as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+    written = 0
+    for size, pixels in THUMBNAIL_SIZES.items():
+        thumbnail = ImageOps.fit(image, (pixels, pixels), Image.Resampling.LANCZOS)
+        for extension, (image_format, options) in FORMATS.items():
+            output = thumbnail
+            if image_format == "JPEG" and output.mode == "RGBA":
+                # JPEG no tiene transparencia: se compone sobre fondo blanco.
+                background = Image.new("RGB", output.size, (255, 255, 255))
+                background.paste(output, mask=output.getchannel("A"))
+                output = background
+            buffer = BytesIO()
+            output.save(buffer, image_format, **options)
+            target = variant_name(name, size, extension)
+            save_variant(storage, target, ContentFile(buffer.getvalue()))
+            written += 1
+    return written
+
+
+def save_variant(storage, name, content):
+    """
+    Escribe una variante con su nombre exacto, reemplazando la anterior.
+    """
+    if hasattr(storage, "save_derived"):
+        # El almacenamiento por contenido renombraría el archivo por su hash.
+        return storage.save_derived(name, content)
+    if storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, content)
+
+
+def mark_variants_ready(name):
+    """
+    Anota en los usuarios con la foto `name` que sus miniaturas ya existen.
+    """
+    from .models import User
+
+    for user in User.objects.filter(user_picture=name).exclude(user_picture_thumbs=name):
+        user.user_picture_thumbs = name
+        user.save(update_fields=["user_picture_thumbs"])
+
+
+def generate_variants_safely(storage, name):
+    try:
+        generate_variants(storage, name)
+        mark_variants_ready(name)
+    except Exception:
+        logger.exception("No se pudieron generar las miniaturas de %s", name)
+
+
+def generate_in_background(storage, name):
+    try:
+        generate_variants_safely(storage, name)
+    finally:
+        # El pool no atiende peticiones: nadie más cierra su conexión.
+        connections.close_all()
+
+
+def schedule_variants(field_file):
+    """
+    Encola la generación de variantes de una foto para después del commit.
+    Con IMAGE_PIPELINE_ASYNC = False se generan en el mismo hilo.
+    """
+    storage, name = field_file.storage, field_file.name
+    if getattr(settings, "IMAGE_PIPELINE_ASYNC", True):
+        transaction.on_commit(lambda: get_executor().submit(generate_in_background, storage, name))
+    else:
+        transaction.on_commit(lambda: generate_variants_safely(storage, name))
+
+
+def variants_ready(field_file):
+    return getattr(field_file.instance, f"{field_file.field.name}_thumbs", "") == field_file.name
+
+
+def thumbnail_url(field_file, size, extension="webp"):
+    """
+    URL de la variante pedida, o la del original si aún no se ha generado.
+    """
+    if not field_file:
+        return ""
+    if variants_ready(field_file):
+        return field_file.storage.url(variant_name(field_file.name, size, extension))
+    return field_file.url
@@ -0,0 +1,237 @@
+"""
+Importación masiva de proveedores con sus servicios.
+
+Cada registro es un proveedor: los campos de CustomUserCreationForm más
+`password`, `description` y una lista de `services` (nombre, descripción,
+tarifa y nombre de categoría). Se aceptan dos formatos:
+
+- NDJSON: un objeto por línea, con `services` como lista de objetos.
+- CSV: una fila por servicio con las columnas service_name,
+  service_description, service_rate y service_category. Las filas
+  consecutivas con el mismo email forman un solo proveedor.
+
+Cada registro se valida con los mismos formularios que el registro web y
+los válidos se insertan por lotes con bulk_create dentro de una
+transacción. El hash de las contraseñas (PBKDF2, lo más costoso de la
+importación) se calcula en un pool de procesos.
+"""
+
+import csv
+import json
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.db import DatabaseError, transaction
+
+from searching.forms import ServiceForm
+from searching.models import Service, ServiceCategory
+from searching.signals import index_new_providers
+from .forms import CustomUserCreationForm
+from .models import ServiceProvider, User
+from .signals import set_user_location
+
+USER_FIELDS = (
+    "email", "first_name", "last_name", "user_birthdate", "user_city",
+    "user_address", "user_phone",
+)
+ValidRecord = namedtuple("ValidRecord", "line_number user password description services")
+
+SERVICE_COLUMNS = {
+    "service_name": "name",
+    "service_description": "description",
+    "service_rate": "rate",
+    "service_category": "category",
+}
+
+
+class ImportUserForm(CustomUserCreationForm):
+    """
+    CustomUserCreationForm sin la foto de perfil, que no viene en el archivo.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["user_picture"].required = False
+
+
+def read_ndjson(stream):
+    """
+    Genera (número de línea, registro) de un archivo NDJSON.
+    """
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as error:
+            yield line_number, {"_error": f"JSON inválido: {error}"}
+            continue
+        if not isinstance(record, dict):
+            record = {"_error": "Cada línea debe ser un objeto JSON."}
+        yield line_number, record
+
+
+def read_csv(stream):
+    """
+    Genera (número de línea, registro) de un CSV, agrupando los servicios
+    de filas consecutivas con el mismo email.
+    """
+    rows = enumerate(csv.DictReader(stream), start=2)
+    for _, group in groupby(rows, key=lambda item: (item[1].get("email") or "").strip().lower()):
+        group = list(group)
+        line_number, first = group[0]
+        record = {field: first.get(field, "") for field in (*USER_FIELDS, "password", "description")}
+        record["services"] = [
+            {target: row.get(column, "") for column, target in SERVICE_COLUMNS.items()}
+            for _, row in group
+            if row.get("service_name")
+        ]
+        yield line_number, record
+
+
+def hash_password(password):
+    return make_password(password)
+
+
+class ProviderImporter:
+    """
+    Valida e inserta registros por lotes. Los errores de cada registro se
+    acumulan en `errors` como (línea, email, mensaje) sin detener la importación.
+    """
+
+    def __init__(self, batch_size=200, workers=None, create_categories=False):
+        self.batch_size = batch_size
+        self.workers = workers
+        self.create_categories = create_categories
+        self.categories = dict(ServiceCategory.objects.values_list("name", "pk"))
+        self.seen_emails = set()
+        self.errors = []
+        self.imported = 0
+        self.services_imported = 0
+
+    def validate(self, line_number, record):
+        """
+        Devuelve un ValidRecord listo para insertar, o None si el registro
+        tiene errores.
+        """
+        if "_error" in record:
+            self.errors.append((line_number, "", record["_error"]))
+            return None
+        email = str(record.get("email") or "").strip().lower()
+        password = str(record.get("password") or "")
+        data = {field: record.get(field) or "" for field in USER_FIELDS}
+        data.update({
+            "email": email,
+            "password1": password,
+            "password2": password,
+            "user_role": "service_provider",
+            "description": record.get("description") or "",
+        })
+        if email in self.seen_emails:
+            self.errors.append((line_number, email, "Email repetido en el archivo."))
+            return None
+        form = ImportUserForm(data)
+        if not form.is_valid():
+            self.errors.append((line_number, email, form_errors(form)))
+            return None
+
+        services = []
+        for position, service_data in enumerate(record.get("services") or [], start=1):
+            category_name = (service_data.get("category") or "").strip()
+            category_id = self.category_id(category_name) if category_name else None
+            if category_name and category_id is None:
+                self.errors.append((line_number, email, f"Servicio {position}: categoría desconocida '{category_name}'."))
+                return None
+            service_form = ServiceForm({
+                "name": service_data.get("name") or "",
+                "description": service_data.get("description") or "",
+                "rate": service_data.get("rate") or "",
+                "category": category_id or "",
+            })
+            if not service_form.is_valid():
+                self.errors.append((line_number, email, f"Servicio {position}: {form_errors(service_form)}"))
+                return None
+            services.append(service_form.save(commit=False))
+
+        cleaned = form.cleaned_data
+        user = User(
+            email=email,
+            first_name=cleaned["first_name"],
+            last_name=cleaned["last_name"],
+            user_role="service_provider",
+            user_city=cleaned["user_city"],
+            user_address=cleaned["user_address"],
+            user_phone=cleaned["user_phone"],
+            user_birthdate=cleaned["user_birthdate"],
+        )
+        # bulk_create no dispara pre_save: la ubicación se calcula aquí.
+        set_user_location(user)
+        self.seen_emails.add(email)
+        return ValidRecord(line_number, user, password, cleaned.get("description", ""), services)
+
+    def category_id(self, name):
+        if name not in self.categories and self.create_categories:
+            self.categories[name] = ServiceCategory.objects.get_or_create(name=name)[0].pk
+        return self.categories.get(name)
+
+    def run(self, records, on_batch=None):
+        """
+        Importa un iterable de (línea, registro). `on_batch` recibe el número
+        de proveedores importados tras cada lote.
+        """
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=django.setup) as pool:
+            batch = []
+            for line_number, record in records:
+                valid = self.validate(line_number, record)
+                if valid is None:
+                    continue
+                batch.append(valid)
+                if len(batch) >= self.batch_size:
+                    self.insert(batch, pool)
+                    batch = []
+                    if on_batch:
+                        on_batch(self.imported)
+            if batch:
+                self.insert(batch, pool)
+                if on_batch:
+                    on_batch(self.imported)
+
+    def insert(self, batch, pool):
+        passwords = [record.password for record in batch]
+        chunksize = max(1, len(passwords) // ((self.workers or 4) * 4))
+        for record, hashed in zip(batch, pool.map(hash_password, passwords, chunksize=chunksize)):
+            record.user.password = hashed
+        try:
+            with transaction.atomic():
+                users = User.objects.bulk_create([record.user for record in batch])
+                providers = ServiceProvider.objects.bulk_create([
+                    ServiceProvider(user=user, description=record.description)
+                    for user, record in zip(users, batch)
+                ])
+                services = []
+                for provider, record in zip(providers, batch):
+                    for service in record.services:
+                        service.provider = provider
+                        services.append(service)
+                Service.objects.bulk_create(services)
+        except DatabaseError as error:
+            # Un lote fallido (p. ej. un email que se registró durante la
+            # importación) no detiene el resto del archivo.
+            for record in batch:
+                self.errors.append((record.line_number, record.user.email, f"Lote no insertado: {error}"))
+                self.seen_emails.discard(record.user.email)
+            return
+        # bulk_create no envía señales: se indexan aquí los proveedores nuevos.
+        index_new_providers([provider.pk for provider in providers])
+        self.imported += len(providers)
+        self.services_imported += len(services)
+
+
+def form_errors(form):
+    return "; ".join(
+        f"{field}: {' '.join(messages)}" if field != "__all__" else " ".join(messages)
+        for field, messages in form.errors.items()
+    )
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.storage import adopt_legacy_files, collect_garbage, recount_references
+
+
+class Command(BaseCommand):
+    help = "Borra los blobs de archivos subidos que ya no referencia ningún registro."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-hours", type=float, default=getattr(settings, "BLOB_GC_GRACE_HOURS", 24),
+            help="Horas que debe llevar un blob sin referencias antes de borrarlo.",
+        )
+        parser.add_argument("--recount", action="store_true", help="Recalcula antes las referencias desde la base de datos.")
+        parser.add_argument(
+            "--adopt-legacy", action="store_true",
+            help="Pasa a blobs los archivos subidos antes del almacenamiento por contenido.",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Solo informa, sin cambiar nada.")
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        if options["adopt_legacy"]:
+            adopted, missing = adopt_legacy_files(default_storage, dry_run=dry_run)
+            for name in missing:
+                self.stderr.write(f"  No existe en disco: {name}")
+            self.stdout.write(f"{adopted} archivos anteriores pasados a blobs.")
+        if options["recount"]:
+            drift = recount_references(fix=not dry_run)
+            for name, stored, actual in drift:
+                self.stdout.write(f"  {name}: {stored} referencias guardadas, {actual} reales")
+            self.stdout.write(f"{len(drift)} conteos de referencias corregidos.")
+        older_than = timezone.now() - timedelta(hours=options["grace_hours"])
+        removed, freed = collect_garbage(default_storage, older_than, dry_run=dry_run)
+        verb = "se borrarían" if dry_run else "borrados"
+        self.stdout.write(self.style.SUCCESS(f"{removed} blobs {verb} ({freed / 1024:.1f} KB)."))
@@ -0,0 +1,38 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.images import generate_variants, mark_variants_ready
+from accounts.models import User
+
+
+class Command(BaseCommand):
+    help = "Genera las miniaturas JPEG y WebP de las fotos de perfil existentes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Regenera también las variantes que ya existen.")
+        parser.add_argument(
+            "--workers", type=int, default=getattr(settings, "IMAGE_PIPELINE_WORKERS", 2),
+            help="Hilos que procesan imágenes en paralelo.",
+        )
+
+    def handle(self, *args, **options):
+        storage = User._meta.get_field("user_picture").storage
+        names = User.objects.exclude(user_picture="").exclude(user_picture__isnull=True).values_list("user_picture", flat=True)
+
+        def process(name):
+            try:
+                return name, generate_variants(storage, name, force=options["force"])
+            except Exception as error:
+                self.stderr.write(f"{name}: {error}")
+                return None, 0
+
+        written = 0
+        with ThreadPoolExecutor(max_workers=max(1, options["workers"])) as executor:
+            for name, count in executor.map(process, names.distinct().iterator()):
+                written += count
+                if name:
+                    # Se anota en este hilo: los del pool solo procesan imágenes.
+                    mark_variants_ready(name)
+        self.stdout.write(self.style.SUCCESS(f"{written} miniaturas generadas."))
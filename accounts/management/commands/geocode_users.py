@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import User
+from accounts.signals import set_user_location
+
+LOCATION_FIELDS = ["user_latitude", "user_longitude", "user_geohash"]
+
+
+class Command(BaseCommand):
+    help = "Deriva las coordenadas de los usuarios a partir de su dirección, con la tabla local de barrios."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Recalcula también a los usuarios que ya tienen coordenadas.")
+
+    def handle(self, *args, **options):
+        users = User.objects.all() if options["all"] else User.objects.filter(user_latitude__isnull=True)
+        located = 0
+        for user in users.iterator():
+            set_user_location(user)
+            # save() con update_fields dispara las señales que actualizan el documento de búsqueda.
+            user.save(update_fields=LOCATION_FIELDS)
+            located += user.user_latitude is not None
+        self.stdout.write(self.style.SUCCESS(f"{located} usuarios geolocalizados."))
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.importer import ProviderImporter, read_csv, read_ndjson
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa proveedores con sus servicios desde un archivo CSV o NDJSON "
+        "(ver accounts/importer.py para el formato)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Archivo .csv, .ndjson o .jsonl.")
+        parser.add_argument("--format", choices=["csv", "ndjson"], help="Formato del archivo; por defecto se deduce de la extensión.")
+        parser.add_argument("--batch-size", type=int, default=200, help="Proveedores por transacción.")
+        parser.add_argument("--workers", type=int, default=None, help="Procesos para calcular los hash de contraseñas.")
+        parser.add_argument("--create-categories", action="store_true", help="Crea las categorías que no existan.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or ("csv" if path.lower().endswith(".csv") else "ndjson")
+        reader = read_csv if file_format == "csv" else read_ndjson
+        importer = ProviderImporter(
+            batch_size=max(1, options["batch_size"]),
+            workers=options["workers"],
+            create_categories=options["create_categories"],
+        )
+        started = time.monotonic()
+
+        def report(imported):
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"{imported} proveedores importados ({imported / elapsed:.1f}/s)")
+
+        try:
+            with open(path, newline="", encoding="utf-8") as stream:
+                importer.run(reader(stream), on_batch=report if options["verbosity"] > 1 else None)
+        except OSError as error:
+            raise CommandError(f"No se pudo leer {path}: {error}")
+
+        for line_number, email, message in importer.errors:
+            self.stderr.write(f"Línea {line_number} ({email or 'sin email'}): {message}")
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{importer.imported} proveedores y {importer.services_imported} servicios importados, "
+            f"{len(importer.errors)} registros con errores, en {elapsed:.1f} s "
+            f"({importer.imported / elapsed if elapsed else 0:.1f} proveedores/s)."
+        ))
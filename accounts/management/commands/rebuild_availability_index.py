@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from accounts.availability import rebuild_provider_index
+from accounts.models import ServiceProvider, AvailabilityBucket
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de disponibilidad (AvailabilityBucket) de todos los proveedores."
+
+    def handle(self, *args, **options):
+        provider_ids = ServiceProvider.objects.values_list("pk", flat=True)
+        for provider_id in provider_ids.iterator():
+            rebuild_provider_index(provider_id)
+        self.stdout.write(self.style.SUCCESS(
+            f"Índice reconstruido: {AvailabilityBucket.objects.count()} buckets para {provider_ids.count()} proveedores."
+        ))
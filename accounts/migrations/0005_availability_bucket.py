@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:31
+
+from datetime import timezone as dt_timezone
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Copias de accounts.availability en el momento de esta migración: una
+# migración no debe depender de código de la app que puede cambiar.
+BUCKET_SECONDS = 3600
+
+
+def merge_intervals(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def bucket_of(moment):
+    return int(moment.astimezone(dt_timezone.utc).timestamp() // BUCKET_SECONDS)
+
+
+def build_availability_index(apps, schema_editor):
+    Availability = apps.get_model('accounts', 'Availability')
+    AvailabilityBucket = apps.get_model('accounts', 'AvailabilityBucket')
+    by_provider = {}
+    for provider_id, start, end in Availability.objects.values_list('provider_id', 'start_time', 'end_time'):
+        by_provider.setdefault(provider_id, []).append((start, end))
+    rows = [
+        AvailabilityBucket(provider_id=provider_id, bucket=bucket, start_time=start, end_time=end)
+        for provider_id, intervals in by_provider.items()
+        for start, end in merge_intervals(intervals)
+        for bucket in range(bucket_of(start), bucket_of(end) + 1)
+    ]
+    AvailabilityBucket.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_availability'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvailabilityBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.IntegerField(help_text='Horas desde el epoch UTC')),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('provider', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability_buckets', to='accounts.serviceprovider')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket', 'end_time'], name='accounts_avail_bucket_idx')],
+            },
+        ),
+        migrations.RunPython(build_availability_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_availability_bucket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='user_geohash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=12),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='user_latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='user_longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
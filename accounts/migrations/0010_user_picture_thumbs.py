@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_stored_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='user_picture_thumbs',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+    ]
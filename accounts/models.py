@@ -50,8 +50,15 @@ class User(AbstractUser):
     user_phone = models.CharField(max_length=20, blank=False, null=False)
     user_address = models.CharField(max_length=100, blank=False, null=False)
     user_picture = models.ImageField(upload_to='profiles/', blank=True, null=True)
+    # Nombre de la foto cuyas miniaturas ya existen (ver accounts/images.py).
+    user_picture_thumbs = models.CharField(max_length=100, blank=True, default='')
     user_score = models.FloatField(default=5.0, blank=True, null=True)
 
+    # Coordenadas derivadas de user_address con la tabla local de accounts/geo.py
+    user_latitude = models.FloatField(blank=True, null=True)
+    user_longitude = models.FloatField(blank=True, null=True)
+    user_geohash = models.CharField(max_length=12, blank=True, default='', db_index=True)
+
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = [] 
 
@@ -64,9 +71,35 @@ class ServiceProvider(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="service_provider_profile")
     description = models.TextField(blank=True, null=True)
 
+    # Agregados de las reseñas, mantenidos con F() por interactions/ratings.py.
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
     def __str__(self):
         return f"Provider profile of {self.user.email}"
 
+    @property
+    def rating_average(self):
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
+    def rating_histogram(self):
+        """
+        Lista de (estrellas, reseñas, porcentaje) de 5 a 1 estrellas.
+        """
+        histogram = []
+        for stars in range(5, 0, -1):
+            count = getattr(self, f"rating_{stars}")
+            percent = round(100 * count / self.rating_count) if self.rating_count else 0
+            histogram.append((stars, count, percent))
+        return histogram
+
     
 
 # Model for service provider experiences
@@ -89,4 +122,100 @@ class Availability(models.Model):
     end_time = models.DateTimeField()
 
     def __str__(self):
-        return f'{self.provider.user.email} is available from {self.start_time} to {self.end_time}'
\ No newline at end of file
+        return f'{self.provider.user.email} is available from {self.start_time} to {self.end_time}'
+
+class AvailabilityRule(models.Model):
+    """
+    Disponibilidad semanal recurrente, p. ej. lunes a viernes de 8:00 a 17:00.
+    Las horas son locales (TIME_ZONE); si end_time <= start_time la franja
+    termina al día siguiente. No se materializa: accounts/availability.py la
+    expande solo para la ventana que se consulta.
+    """
+    WEEKDAY_CHOICES = (
+        (0, 'Lunes'),
+        (1, 'Martes'),
+        (2, 'Miércoles'),
+        (3, 'Jueves'),
+        (4, 'Viernes'),
+        (5, 'Sábado'),
+        (6, 'Domingo'),
+    )
+
+    provider = models.ForeignKey(ServiceProvider, on_delete=models.CASCADE, related_name='availability_rules')
+    weekdays = models.PositiveSmallIntegerField(help_text="Máscara de bits: el bit 0 es el lunes")
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    valid_from = models.DateField()
+    valid_until = models.DateField(blank=True, null=True)
+
+    def applies_on(self, day):
+        return bool(self.weekdays & (1 << day.weekday()))
+
+    def weekday_names(self):
+        return [name for number, name in self.WEEKDAY_CHOICES if self.weekdays & (1 << number)]
+
+    def __str__(self):
+        days = ', '.join(self.weekday_names())
+        return f'{self.provider.user.email}: {days} {self.start_time:%H:%M}-{self.end_time:%H:%M}'
+
+
+class AvailabilityException(models.Model):
+    """
+    Intervalo en el que el proveedor no está disponible aunque una regla o
+    un horario puntual digan lo contrario (vacaciones, festivos, etc.).
+    """
+    provider = models.ForeignKey(ServiceProvider, on_delete=models.CASCADE, related_name='availability_exceptions')
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    reason = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['provider', 'start_time'], name='accounts_avail_exc_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.provider.user.email} is unavailable from {self.start_time} to {self.end_time}'
+
+
+class AvailabilityBucket(models.Model):
+    """
+    Índice precalculado de disponibilidad. Guarda los intervalos fusionados de
+    cada proveedor, repetidos en cada hora (bucket) que cubren, para que la
+    búsqueda por ventana sea una consulta por índice y no un recorrido de
+    Availability. Se mantiene desde accounts/signals.py.
+    """
+    provider = models.ForeignKey(ServiceProvider, on_delete=models.CASCADE, related_name='availability_buckets')
+    bucket = models.IntegerField(help_text="Horas desde el epoch UTC")
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['bucket', 'end_time'], name='accounts_avail_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f'Bucket {self.bucket} of provider {self.provider_id}: {self.start_time} - {self.end_time}'
+
+
+class StoredBlob(models.Model):
+    """
+    Archivo guardado una sola vez por su contenido (ver accounts/storage.py).
+    `ref_count` cuenta los campos de archivo que lo referencian; los blobs sin
+    referencias los borra el comando collect_blobs.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    digest = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["ref_count", "updated_at"], name="stored_blob_gc_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
@@ -0,0 +1,105 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .availability import rebuild_provider_index
+from .cache import invalidate_user
+from .geo import geohash_encode, locate_address
+from .images import schedule_variants
+from .models import User, ServiceProvider, Availability
+from .storage import acquire, file_fields, referencing_models, release
+
+
+def set_user_location(user):
+    """
+    Asigna coordenadas y geohash a partir de la dirección y la ciudad.
+    """
+    coordinates = locate_address(user.user_address, user.user_city)
+    if coordinates is None:
+        user.user_latitude = user.user_longitude = None
+        user.user_geohash = ''
+        return
+    user.user_latitude, user.user_longitude = coordinates
+    user.user_geohash = geohash_encode(*coordinates)
+
+
+@receiver(pre_save, sender=User)
+def locate_user(sender, instance, update_fields=None, **kwargs):
+    # Los guardados parciales (p. ej. last_login) no cambian la dirección.
+    if update_fields is None:
+        set_user_location(instance)
+
+
+@receiver(post_save, sender=User)
+def make_picture_thumbnails(sender, instance, update_fields=None, **kwargs):
+    if not instance.user_picture:
+        return
+    if update_fields is not None and 'user_picture' not in update_fields:
+        return
+    # El worker no hace nada si las variantes de esta foto ya existen.
+    schedule_variants(instance.user_picture)
+
+
+@receiver(post_save, sender=Availability)
+def reindex_availability_on_save(sender, instance, **kwargs):
+    rebuild_provider_index(instance.provider_id)
+
+
+@receiver(post_delete, sender=Availability)
+def reindex_availability_on_delete(sender, instance, origin=None, **kwargs):
+    # Si el borrado viene en cascada desde el proveedor o su usuario, los
+    # buckets también se borran en cascada y no hay nada que recalcular.
+    if origin is not None and not isinstance(origin, Availability) and getattr(origin, 'model', None) is not Availability:
+        return
+    rebuild_provider_index(instance.provider_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=ServiceProvider)
+@receiver(post_delete, sender=ServiceProvider)
+def invalidate_cached_provider(sender, instance, **kwargs):
+    invalidate_user(instance.user_id)
+
+
+def remember_stored_files(sender, instance, update_fields=None, **kwargs):
+    # Nombres guardados antes del cambio, para ajustar las referencias de los blobs.
+    fields = file_fields(sender)
+    if update_fields is not None:
+        fields = tuple(field for field in fields if field in update_fields)
+    instance._stored_files = {}
+    if fields and instance.pk and not kwargs.get("raw"):
+        instance._stored_files = sender._default_manager.filter(pk=instance.pk).values(*fields).first() or {}
+
+
+def count_stored_files(sender, instance, created=False, update_fields=None, **kwargs):
+    fields = file_fields(sender)
+    if update_fields is not None:
+        fields = tuple(field for field in fields if field in update_fields)
+    previous = getattr(instance, "_stored_files", {})
+    for field in fields:
+        old_name = previous.get(field) or ""
+        new_name = getattr(instance, field).name or ""
+        if new_name != old_name:
+            acquire(new_name)
+            release(old_name)
+
+
+def release_stored_files(sender, instance, **kwargs):
+    for field in file_fields(sender):
+        release(getattr(instance, field).name)
+
+
+def connect_stored_file_signals():
+    """
+    Conecta los receptores de blobs solo a los modelos con campos de archivo.
+    Un receptor de post_delete sin sender haría que cada borrado masivo de
+    cualquier modelo cargara las filas para enviar la señal.
+    """
+    for model, _ in referencing_models():
+        pre_save.connect(remember_stored_files, sender=model)
+        post_save.connect(count_stored_files, sender=model)
+        post_delete.connect(release_stored_files, sender=model)
@@ -0,0 +1,200 @@
+"""
+Almacenamiento direccionado por contenido para los archivos subidos.
+
+Cada archivo se guarda con el nombre de su SHA-256 dentro del directorio de
+upload_to: profiles/3f/3fa9...c2.png. El hash se calcula leyendo el archivo
+por bloques antes de escribir nada; si ya hay un blob con ese contenido se
+devuelve su nombre sin volver a escribirlo, así que subir dos veces el mismo
+archivo no ocupa más disco.
+
+StoredBlob cuenta cuántos campos de archivo referencian cada blob. Las
+señales de accounts/signals.py llaman a `acquire` y `release` al guardar y
+borrar los modelos, y el comando collect_blobs borra los blobs que se
+quedaron sin referencias.
+"""
+
+import hashlib
+import posixpath
+from collections import Counter
+from functools import cache
+
+from django.apps import apps
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+from django.db.models import F
+from django.utils import timezone
+
+from .images import variant_names
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def content_digest(content):
+    """
+    SHA-256 del contenido, leído por bloques para no cargarlo entero en memoria.
+    """
+    digest = hashlib.sha256()
+    for chunk in content.chunks(chunk_size=HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def blob_name(name, digest):
+    """
+    Nombre del blob: el directorio de `name`, los dos primeros caracteres del
+    hash (para no acumular miles de archivos por directorio) y la extensión.
+    """
+    directory = posixpath.dirname(name)
+    extension = posixpath.splitext(name)[1].lower()
+    return posixpath.join(directory, digest[:2], f"{digest}{extension}")
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage que nombra los archivos por su contenido y registra
+    cada blob en StoredBlob.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        digest = content_digest(content)
+        target = blob_name(name, digest)
+        if not self.exists(target):
+            content.seek(0)
+            target = super().save(target, content, max_length=max_length)
+        StoredBlob = apps.get_model("accounts", "StoredBlob")
+        StoredBlob.objects.get_or_create(name=target, defaults={"digest": digest, "size": content.size})
+        return target
+
+    def save_derived(self, name, content):
+        """
+        Guarda un archivo derivado (p. ej. una miniatura) con su nombre exacto,
+        reemplazando el anterior. No se registra como blob.
+        """
+        if self.exists(name):
+            self.delete(name)
+        return super().save(name, content)
+
+
+@cache
+def file_fields(model):
+    """
+    Nombres de los campos de archivo del modelo guardados en un ContentAddressedStorage.
+    """
+    return tuple(
+        field.name for field in model._meta.concrete_fields
+        if isinstance(field, models.FileField) and isinstance(field.storage, ContentAddressedStorage)
+    )
+
+
+def referencing_models():
+    return [(model, file_fields(model)) for model in apps.get_models() if file_fields(model)]
+
+
+def change_references(name, delta):
+    if name:
+        StoredBlob = apps.get_model("accounts", "StoredBlob")
+        StoredBlob.objects.filter(name=name).update(ref_count=F("ref_count") + delta, updated_at=timezone.now())
+
+
+def acquire(name):
+    change_references(name, 1)
+
+
+def release(name):
+    change_references(name, -1)
+
+
+def referenced_names():
+    """
+    Cuántas veces aparece cada nombre de archivo en los campos que usan este almacenamiento.
+    """
+    counts = Counter()
+    for model, fields in referencing_models():
+        for field in fields:
+            names = model._default_manager.exclude(**{f"{field}__isnull": True}).exclude(**{field: ""})
+            counts.update(names.values_list(field, flat=True).iterator())
+    return counts
+
+
+def recount_references(fix=True):
+    """
+    Recalcula ref_count desde los campos de archivo. Devuelve las diferencias
+    (nombre, guardado, real) y, si `fix`, las corrige.
+    """
+    StoredBlob = apps.get_model("accounts", "StoredBlob")
+    counts = referenced_names()
+    now = timezone.now()
+    drift = []
+    to_update = []
+    for blob in StoredBlob.objects.only("pk", "name", "ref_count").iterator():
+        actual = counts.get(blob.name, 0)
+        if blob.ref_count != actual:
+            drift.append((blob.name, blob.ref_count, actual))
+            blob.ref_count = actual
+            blob.updated_at = now
+            to_update.append(blob)
+    if fix:
+        StoredBlob.objects.bulk_update(to_update, ["ref_count", "updated_at"], batch_size=500)
+    return drift
+
+
+def adopt_legacy_files(storage, dry_run=False):
+    """
+    Pasa a blobs los archivos subidos antes de este almacenamiento: los
+    duplicados quedan en un solo blob y se borran los archivos viejos.
+    Devuelve (archivos adoptados, nombres que no existen en disco).
+    """
+    StoredBlob = apps.get_model("accounts", "StoredBlob")
+    known = set(StoredBlob.objects.values_list("name", flat=True))
+    adopted, missing = 0, []
+    for model, fields in referencing_models():
+        for field in fields:
+            legacy = (
+                model._default_manager.exclude(**{f"{field}__isnull": True}).exclude(**{field: ""})
+                .exclude(**{f"{field}__in": known}).order_by("pk")
+            )
+            for instance in legacy.iterator():
+                old_name = getattr(instance, field).name
+                if not storage.exists(old_name):
+                    missing.append(old_name)
+                    continue
+                adopted += 1
+                if dry_run:
+                    continue
+                with storage.open(old_name, "rb") as source:
+                    new_name = storage.save(old_name, source)
+                # save() con update_fields envía las señales que suman la referencia al blob.
+                setattr(instance, field, new_name)
+                instance.save(update_fields=[field])
+                if not model._default_manager.filter(**{field: old_name}).exists():
+                    for name in [old_name, *variant_names(old_name)]:
+                        if storage.exists(name):
+                            storage.delete(name)
+    return adopted, missing
+
+
+def collect_garbage(storage, older_than, dry_run=False):
+    """
+    Borra, con sus miniaturas, los blobs sin referencias que no cambian desde
+    `older_than`. Devuelve (blobs borrados, bytes liberados).
+    """
+    StoredBlob = apps.get_model("accounts", "StoredBlob")
+    removed, freed = 0, 0
+    orphans = StoredBlob.objects.filter(ref_count__lte=0, updated_at__lt=older_than)
+    for blob in orphans.iterator():
+        if not dry_run:
+            # Se vuelve a filtrar por ref_count por si el blob se referenció mientras tanto.
+            deleted, _ = StoredBlob.objects.filter(pk=blob.pk, ref_count__lte=0).delete()
+            if not deleted:
+                continue
+            for name in [blob.name, *variant_names(blob.name)]:
+                if storage.exists(name):
+                    storage.delete(name)
+        removed += 1
+        freed += blob.size
+    return removed, freed
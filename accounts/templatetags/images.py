@@ -0,0 +1,30 @@
+from django import template
+from django.utils.html import format_html
+
+from accounts.images import thumbnail_url as variant_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def thumbnail_url(field_file, size="sm", extension="webp"):
+    """
+    {% thumbnail_url user.user_picture "md" %} -> URL de la miniatura.
+    """
+    return variant_url(field_file, size, extension)
+
+
+@register.simple_tag
+def avatar(field_file, size="sm", css_class="", alt=""):
+    """
+    <picture> con la miniatura WebP y JPEG de respaldo para navegadores sin WebP.
+    """
+    if not field_file:
+        return ""
+    return format_html(
+        '<picture><source srcset="{}" type="image/webp"><img src="{}" alt="{}" class="{}"></picture>',
+        variant_url(field_file, size, "webp"),
+        variant_url(field_file, size, "jpg"),
+        alt,
+        css_class,
+    )
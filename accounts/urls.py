@@ -10,4 +10,6 @@ urlpatterns = [
     path('user/<int:user_id>/', views.user_profile_view, name='user_profile'),
     path('profile/availability/', views.availability_view, name='availability'),
     path('profile/availability/delete/<int:availability_id>/', views.delete_availability, name='delete_availability'),
+    path('profile/availability/rules/delete/<int:rule_id>/', views.delete_availability_rule, name='delete_availability_rule'),
+    path('profile/availability/exceptions/delete/<int:exception_id>/', views.delete_availability_exception, name='delete_availability_exception'),
 ]
\ No newline at end of file
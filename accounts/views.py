@@ -2,9 +2,10 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponseForbidden
-from .forms import CustomUserCreationForm, EditProfileForm, ServiceProviderForm, AvailabilityForm
-from .models import User, ServiceProvider, Availability
+from django.http import Http404, HttpResponseForbidden
+from .cache import get_provider_profile
+from .forms import CustomUserCreationForm, EditProfileForm, ServiceProviderForm, AvailabilityForm, AvailabilityRuleForm, AvailabilityExceptionForm
+from .models import User, ServiceProvider, Availability, AvailabilityRule, AvailabilityException
 from interactions.models import Chat
 from django.http import JsonResponse
 from django.urls import reverse
@@ -62,14 +63,17 @@ def edit_profile_view(request):
     user = request.user
     service_provider = None
     if user.is_service_provider:
-        service_provider, _ = ServiceProvider.objects.get_or_create(user=user)
+        service_provider = get_provider_profile(user) or ServiceProvider.objects.create(user=user)
     if request.method == "POST":
         user_form = EditProfileForm(request.POST, request.FILES, instance=user)
         provider_form = ServiceProviderForm(request.POST, instance=service_provider) if service_provider else None
         if user_form.is_valid() and (provider_form is None or provider_form.is_valid()):
             user_form.save()
             if provider_form:
-                provider_form.save()
+                # El perfil viene de la caché: guardar solo los campos del
+                # formulario para no pisar los contadores de calificaciones.
+                provider = provider_form.save(commit=False)
+                provider.save(update_fields=list(provider_form.fields))
             return redirect("profile")
     else:
         user_form = EditProfileForm(instance=user)
@@ -80,9 +84,14 @@ def edit_profile_view(request):
 @login_required
 def profile_view(request):
     chats = None
+    provider = None
+    services = []
     if request.user.is_service_provider:
         chats = Chat.objects.filter(provider=request.user)
-    return render(request, "profile.html", {"chats": chats})
+        provider = get_provider_profile(request.user)
+        if provider is not None:
+            services = provider.services.select_related('category')
+    return render(request, "profile.html", {"chats": chats, "provider": provider, "services": services})
 
 
 @login_required
@@ -93,20 +102,42 @@ def user_profile_view(request, user_id):
 
 @login_required
 def availability_view(request):
-    provider = get_object_or_404(ServiceProvider, user=request.user)
+    provider = get_provider_profile(request.user)
+    if provider is None:
+        raise Http404("No eres proveedor.")
+    form = AvailabilityForm()
+    rule_form = AvailabilityRuleForm()
+    exception_form = AvailabilityExceptionForm()
     if request.method == 'POST':
-        form = AvailabilityForm(request.POST)
-        if form.is_valid():
-            availability = form.save(commit=False)
-            availability.provider = provider
-            availability.save()
-            messages.success(request, "Nuevo horario de disponibilidad añadido.")
+        # Cada formulario de la página indica su tipo en `form_type`.
+        form_type = request.POST.get('form_type', 'slot')
+        if form_type == 'rule':
+            rule_form = AvailabilityRuleForm(request.POST)
+            submitted, success_message = rule_form, "Nuevo horario semanal añadido."
+        elif form_type == 'exception':
+            exception_form = AvailabilityExceptionForm(request.POST)
+            submitted, success_message = exception_form, "Nueva excepción añadida."
+        else:
+            form = AvailabilityForm(request.POST)
+            submitted, success_message = form, "Nuevo horario de disponibilidad añadido."
+        if submitted.is_valid():
+            item = submitted.save(commit=False)
+            item.provider = provider
+            item.save()
+            messages.success(request, success_message)
             return redirect('availability')
-    else:
-        form = AvailabilityForm()
-    
+
     availabilities = Availability.objects.filter(provider=provider).order_by('start_time')
-    return render(request, 'availability.html', {'form': form, 'availabilities': availabilities})
+    rules = AvailabilityRule.objects.filter(provider=provider).order_by('valid_from', 'start_time')
+    exceptions = AvailabilityException.objects.filter(provider=provider).order_by('start_time')
+    return render(request, 'availability.html', {
+        'form': form,
+        'rule_form': rule_form,
+        'exception_form': exception_form,
+        'availabilities': availabilities,
+        'rules': rules,
+        'exceptions': exceptions,
+    })
 
 
 @login_required
@@ -120,4 +151,22 @@ def delete_availability(request, availability_id):
         availability.delete()
         messages.success(request, "Horario de disponibilidad eliminado correctamente.")
     
-    return redirect('availability')
\ No newline at end of file
+    return redirect('availability')
+
+
+@login_required
+def delete_availability_rule(request, rule_id):
+    rule = get_object_or_404(AvailabilityRule, id=rule_id, provider__user=request.user)
+    if request.method == 'POST':
+        rule.delete()
+        messages.success(request, "Horario semanal eliminado correctamente.")
+    return redirect('availability')
+
+
+@login_required
+def delete_availability_exception(request, exception_id):
+    exception = get_object_or_404(AvailabilityException, id=exception_id, provider__user=request.user)
+    if request.method == 'POST':
+        exception.delete()
+        messages.success(request, "Excepción eliminada correctamente.")
+    return redirect('availability')
@@ -0,0 +1,80 @@
+"""
+Actividad de cada chat: fecha y vista previa del último mensaje y número de
+mensajes, guardados en Chat para que la lista de chats salga en orden de
+actividad con una consulta por índice, sin agregar sobre Message.
+
+La lectura se guarda igual, por participante y no por mensaje: el id del
+último mensaje leído y un contador de no leídos que cada mensaje nuevo
+incrementa para el destinatario.
+"""
+
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils.text import Truncator
+
+from .models import Chat, Message
+
+PREVIEW_LENGTH = Chat._meta.get_field('last_message_preview').max_length
+
+
+def preview(content):
+    return Truncator(" ".join(content.split())).chars(PREVIEW_LENGTH)
+
+
+def record_message(message):
+    """
+    Suma un mensaje nuevo a su chat con un solo UPDATE. El último mensaje
+    solo avanza si este es más reciente, así que dos envíos simultáneos no
+    dejan la vista previa desordenada. El mensaje queda sin leer para el
+    otro participante.
+    """
+    newer = Q(last_message_at__isnull=True) | Q(last_message_at__lte=message.timestamp)
+    from_seeker = Q(seeker_id=message.sender_id)
+    Chat.objects.filter(pk=message.chat_id).update(
+        message_count=F('message_count') + 1,
+        provider_unread=F('provider_unread') + Case(When(from_seeker, then=Value(1)), default=Value(0)),
+        seeker_unread=F('seeker_unread') + Case(When(from_seeker, then=Value(0)), default=Value(1)),
+        last_message_at=Case(When(newer, then=Value(message.timestamp)), default=F('last_message_at')),
+        last_message_preview=Case(When(newer, then=Value(preview(message.content))), default=F('last_message_preview')),
+    )
+
+
+def clear_activity(chat_id):
+    Chat.objects.filter(pk=chat_id).update(
+        message_count=0, last_message_at=None, last_message_preview='', seeker_unread=0, provider_unread=0,
+    )
+
+
+def participant_side(chat, user):
+    """
+    'seeker' o 'provider' según el papel de `user` en el chat, o None.
+    """
+    if chat.seeker_id == user.pk:
+        return 'seeker'
+    if chat.provider_id == user.pk:
+        return 'provider'
+    return None
+
+
+def mark_read(chat, user, message_id):
+    """
+    Avanza hasta `message_id` la marca de lectura de `user` con un solo
+    UPDATE. Los no leídos se recuentan en la misma sentencia como los
+    mensajes del otro participante posteriores a la marca, así que un
+    mensaje que llegue mientras tanto no se pierde. Una marca que no
+    avanza no escribe nada.
+    """
+    side = participant_side(chat, user)
+    if side is None or not message_id:
+        return 0
+    last_read = f'{side}_last_read'
+    after = (
+        Message.objects.filter(chat=OuterRef('pk'), id__gt=message_id)
+        .exclude(sender_id=user.pk)
+        .order_by().values('chat').annotate(total=Count('id')).values('total')
+    )
+    return Chat.objects.filter(pk=chat.pk, **{f'{last_read}__lt': message_id}).update(**{
+        last_read: message_id,
+        f'{side}_unread': Coalesce(Subquery(after), Value(0)),
+    })
+
@@ -1,3 +1,11 @@
 from django.contrib import admin
+from .models import Review
 
-# Register your models here.
+
+@admin.register(Review)
+class ReviewAdmin(admin.ModelAdmin):
+    list_display = ("booking", "provider", "reviewer", "rating", "created_at")
+    search_fields = ("reviewer__email", "provider__user__email")
+    list_filter = ("rating",)
+    # Editar la reseña desde aquí también actualiza los agregados del proveedor.
+    readonly_fields = ("booking", "provider", "reviewer")
@@ -1,10 +1,10 @@
-from .models import Notification
+from .notifications import unread_count
 
 def unread_notifications_count(request):
     """
     Hace que el número de notificaciones no leídas esté disponible en todas las plantillas.
+    El número sale de la caché (ver interactions/notifications.py).
     """
     if request.user.is_authenticated:
-        count = Notification.objects.filter(recipient=request.user, is_read=False).count()
-        return {'unread_notifications': count}
+        return {'unread_notifications': unread_count(request.user.pk)}
     return {'unread_notifications': 0}
\ No newline at end of file
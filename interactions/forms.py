@@ -0,0 +1,17 @@
+from django import forms
+from .models import Review
+
+class ReviewForm(forms.ModelForm):
+    class Meta:
+        model = Review
+        fields = ['rating', 'comment']
+        widgets = {
+            'rating': forms.RadioSelect(attrs={
+                'class': 'mr-1'
+            }),
+            'comment': forms.Textarea(attrs={
+                'placeholder': 'Cuenta cómo fue el servicio (opcional)',
+                'class': 'w-full p-3 border border-gray-300 rounded-lg focus:ring-2 focus:ring-indigo-500',
+                'rows': 4
+            }),
+        }
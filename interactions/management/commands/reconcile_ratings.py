@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from interactions.ratings import reconcile_ratings
+
+
+class Command(BaseCommand):
+    help = "Recalcula desde las reseñas los contadores y promedios de los proveedores, y reporta las diferencias."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Solo reporta las diferencias, sin corregirlas.")
+        parser.add_argument("--batch-size", type=int, default=500, help="Proveedores por lote (500 por defecto).")
+
+    def handle(self, *args, **options):
+        drift = reconcile_ratings(fix=not options["dry_run"], batch_size=options["batch_size"])
+        for provider_id, field, stored, actual in drift:
+            self.stdout.write(f"  Proveedor {provider_id}: {field} guardado {stored}, real {actual}")
+        providers = len({provider_id for provider_id, *_ in drift})
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Sin diferencias."))
+        elif options["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"{len(drift)} diferencias en {providers} proveedores (sin corregir)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{len(drift)} diferencias corregidas en {providers} proveedores."))
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:20
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+from django.utils.text import Truncator
+
+# Copia de interactions.activity.preview en el momento de esta migración.
+PREVIEW_LENGTH = 120
+
+
+def preview(content):
+    return Truncator(" ".join(content.split())).chars(PREVIEW_LENGTH)
+
+
+def fill_chat_activity(apps, schema_editor):
+    Chat = apps.get_model('interactions', 'Chat')
+    Message = apps.get_model('interactions', 'Message')
+    chats = []
+    for chat in Chat.objects.annotate(total=Count('messages'), latest=Max('messages__id')).filter(total__gt=0):
+        last = Message.objects.get(pk=chat.latest)
+        chat.message_count = chat.total
+        chat.last_message_at = last.timestamp
+        chat.last_message_preview = preview(last.content)
+        chats.append(chat)
+    Chat.objects.bulk_update(chats, ['message_count', 'last_message_at', 'last_message_preview'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactions', '0004_message_chat_time_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chat',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='last_message_preview',
+            field=models.CharField(blank=True, default='', max_length=120),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='message_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='chat',
+            index=models.Index(fields=['seeker', '-last_message_at'], name='chat_seeker_activity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chat',
+            index=models.Index(fields=['provider', '-last_message_at'], name='chat_provider_activity_idx'),
+        ),
+        migrations.RunPython(fill_chat_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:25
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def mark_history_read(apps, schema_editor):
+    # Antes no había estado de lectura: los mensajes existentes cuentan como leídos.
+    Chat = apps.get_model('interactions', 'Chat')
+    Message = apps.get_model('interactions', 'Message')
+    latest = Message.objects.filter(chat=OuterRef('pk')).order_by().values('chat').annotate(latest=Max('id')).values('latest')
+    last_id = Coalesce(Subquery(latest), Value(0))
+    Chat.objects.update(seeker_last_read=last_id, provider_last_read=last_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactions', '0005_chat_activity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chat',
+            name='provider_last_read',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='provider_unread',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='seeker_last_read',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='seeker_unread',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(mark_history_read, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,7 @@
 
 from django.db import models
 from django.conf import settings
+from django.core.validators import MaxValueValidator, MinValueValidator
 from searching.models import Service
 
 class Chat(models.Model):
@@ -17,6 +18,25 @@ class Chat(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Actividad desnormalizada, mantenida por interactions/activity.py.
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    last_message_preview = models.CharField(max_length=120, blank=True, default='')
+    message_count = models.PositiveIntegerField(default=0)
+
+    # Lectura de cada participante: id del último mensaje leído y cuántos
+    # mensajes del otro participante llegaron después.
+    seeker_last_read = models.PositiveBigIntegerField(default=0)
+    provider_last_read = models.PositiveBigIntegerField(default=0)
+    seeker_unread = models.PositiveIntegerField(default=0)
+    provider_unread = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Lista de chats de cada participante por actividad reciente.
+            models.Index(fields=['seeker', '-last_message_at'], name='chat_seeker_activity_idx'),
+            models.Index(fields=['provider', '-last_message_at'], name='chat_provider_activity_idx'),
+        ]
+
     def __str__(self):
         return f"Chat between {self.seeker.email} and {self.provider.email}"
 
@@ -26,6 +46,12 @@ class Message(models.Model):
     content = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Historial del chat por páginas hacia atrás con cursor (timestamp, id).
+            models.Index(fields=['chat', 'timestamp', 'id'], name='message_chat_time_idx'),
+        ]
+
     def __str__(self):
         return f"Message from {self.sender.email} at {self.timestamp}"
 
@@ -48,6 +74,35 @@ class Booking(models.Model):
     def __str__(self):
         return f"Booking for {self.service.name} with {self.chat.seeker.email}"
 
+class Review(models.Model):
+    """
+    Reseña del cliente sobre una reserva completada. Al crearla, editarla o
+    borrarla, interactions/signals.py actualiza los agregados del proveedor.
+    """
+    RATING_CHOICES = [(stars, f"{stars} ★") for stars in range(1, 6)]
+
+    booking = models.OneToOneField(Booking, on_delete=models.CASCADE, related_name='review')
+    provider = models.ForeignKey('accounts.ServiceProvider', on_delete=models.CASCADE, related_name='reviews')
+    reviewer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='reviews_written')
+    rating = models.PositiveSmallIntegerField(
+        choices=RATING_CHOICES,
+        validators=[MinValueValidator(1), MaxValueValidator(5)],
+    )
+    comment = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(condition=models.Q(rating__gte=1, rating__lte=5), name='review_rating_range'),
+        ]
+        indexes = [
+            models.Index(fields=['provider', '-created_at'], name='review_provider_idx'),
+        ]
+
+    def __str__(self):
+        return f"Review of {self.booking} ({self.rating})"
+
 class Notification(models.Model):
     recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications')
     booking = models.ForeignKey(Booking, on_delete=models.CASCADE, null=True, blank=True)
@@ -59,4 +114,8 @@ class Notification(models.Model):
         return f"Notification for {self.recipient.email}: {self.message}"
 
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            # Conteo de no leídas cuando el contador no está en caché.
+            models.Index(fields=['recipient', 'is_read'], name='notification_unread_idx'),
+        ]
\ No newline at end of file
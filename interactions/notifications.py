@@ -0,0 +1,245 @@
+"""
+Servicio de notificaciones.
+
+`notify` encola la notificación tras el commit y vuelve enseguida: la
+petición no espera a la base de datos ni al correo. Un hilo de fondo junta
+los eventos que llegan dentro de NOTIFICATION_BATCH_SECONDS, deja uno solo
+por destinatario y reserva (el más reciente: si el cliente envía una
+solicitud y la cancela, el proveedor solo recibe la cancelación; las
+notificaciones sin reserva no se juntan), los guarda con un bulk_create y, con
+NOTIFICATION_EMAIL_DIGESTS, envía a cada destinatario un correo con todas
+sus notificaciones del lote. Con NOTIFICATION_QUEUE_ASYNC = False cada
+notificación se entrega en el mismo hilo tras el commit.
+
+bulk_create no envía señales, así que la entrega actualiza aquí el
+contador de no leídas y publica cada notificación en la capa de tiempo real.
+La cola vive en memoria: lo pendiente se entrega al salir el proceso, pero
+se pierde si el proceso muere.
+
+El contador de no leídas de cada usuario se guarda en la caché compartida
+(ver accounts/checks.py). Crear una notificación lo incrementa tras el
+commit y `notification_list` lo borra al marcarlas como leídas, así que
+mostrarlo en cada página no consulta la base de datos. Si no está en la
+caché se cuenta con el índice (recipient, is_read) de Notification.
+
+Solo Redis, Memcached y LocMemCache incrementan de forma atómica; con
+otros backends (p. ej. FileBasedCache, donde incr es leer y escribir) el
+hilo de entrega y las peticiones perderían incrementos, así que en lugar
+de incrementar se borra el contador y la siguiente lectura lo recuenta.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import Counter, defaultdict, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import connections, transaction
+
+from accounts.models import User
+from .models import Notification
+from .realtime import publish_notification
+
+logger = logging.getLogger(__name__)
+
+UNREAD_KEY = "notifications:unread:{}"
+
+# Backends cuyo incr es atómico.
+ATOMIC_INCR_CACHES = {
+    "django.core.cache.backends.redis.RedisCache",
+    "django.core.cache.backends.memcached.PyMemcacheCache",
+    "django.core.cache.backends.memcached.PyLibMCCache",
+    "django.core.cache.backends.locmem.LocMemCache",
+}
+
+# Máximo de eventos que se guardan en un mismo lote.
+MAX_BATCH = 500
+
+NotificationEvent = namedtuple("NotificationEvent", "recipient_id booking_id message")
+
+
+# --- Contador de no leídas ---------------------------------------------------
+
+def cache_timeout():
+    return getattr(settings, "NOTIFICATION_COUNT_CACHE_TIMEOUT", 300)
+
+
+def unread_count(user_id):
+    key = UNREAD_KEY.format(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+        # add no pisa un contador que otro proceso haya guardado entretanto.
+        if not cache.add(key, count, cache_timeout()):
+            count = cache.get(key, count)
+    return count
+
+
+def atomic_incr():
+    return settings.CACHES.get("default", {}).get("BACKEND") in ATOMIC_INCR_CACHES
+
+
+def count_new(user_id, amount=1):
+    """
+    Suma `amount` notificaciones nuevas. Sin contador en caché, o si el
+    backend no incrementa de forma atómica, el siguiente `unread_count` lo
+    recalcula.
+    """
+    if not atomic_incr():
+        forget_unread(user_id)
+        return
+    try:
+        cache.incr(UNREAD_KEY.format(user_id), amount)
+    except ValueError:
+        pass
+
+
+def forget_unread(user_id):
+    cache.delete(UNREAD_KEY.format(user_id))
+
+
+# --- Entrega -----------------------------------------------------------------
+
+def coalesce(events):
+    """
+    Un evento por (destinatario, reserva), el último de cada par, en el
+    orden en que llegaron. Los eventos sin reserva se conservan todos.
+    """
+    latest = {}
+    for index, event in enumerate(events):
+        key = (event.recipient_id, event.booking_id) if event.booking_id is not None else index
+        latest.pop(key, None)
+        latest[key] = event
+    return list(latest.values())
+
+
+def deliver(events):
+    """
+    Guarda un lote de eventos y hace lo que harían las señales de cada
+    notificación. Devuelve las notificaciones creadas.
+    """
+    notifications = Notification.objects.bulk_create([
+        Notification(recipient_id=event.recipient_id, booking_id=event.booking_id, message=event.message)
+        for event in coalesce(events)
+    ])
+    for recipient_id, amount in Counter(n.recipient_id for n in notifications).items():
+        count_new(recipient_id, amount)
+    for notification in notifications:
+        publish_notification(notification)
+    if getattr(settings, "NOTIFICATION_EMAIL_DIGESTS", False):
+        send_digests(notifications)
+    return notifications
+
+
+def send_digests(notifications):
+    """
+    Un correo por destinatario con sus notificaciones del lote, por una
+    sola conexión al servidor de correo.
+    """
+    by_recipient = defaultdict(list)
+    for notification in notifications:
+        by_recipient[notification.recipient_id].append(notification.message)
+    emails = dict(User.objects.filter(pk__in=by_recipient).exclude(email="").values_list("pk", "email"))
+    digests = []
+    for recipient_id, lines in by_recipient.items():
+        if recipient_id not in emails:
+            continue
+        subject = "Tienes una notificación nueva en SERCONN" if len(lines) == 1 else f"Tienes {len(lines)} notificaciones nuevas en SERCONN"
+        digests.append(EmailMessage(subject, "\n".join(f"- {line}" for line in lines), to=[emails[recipient_id]]))
+    if digests:
+        get_connection().send_messages(digests)
+
+
+def deliver_safely(events):
+    try:
+        deliver(events)
+    except Exception:
+        logger.exception("No se pudieron entregar %d notificaciones", len(events))
+
+
+class NotificationQueue:
+    """
+    Cola en memoria atendida por un hilo, que entrega los eventos por lotes.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.events = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="notifications", daemon=True)
+        self.thread.start()
+
+    def put(self, event):
+        self.events.put(event)
+
+    def next_batch(self):
+        batch = [self.events.get()]
+        # Los eventos de una ráfaga se entregan juntos.
+        deadline = time.monotonic() + self.window
+        while len(batch) < MAX_BATCH:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.events.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.next_batch()
+            try:
+                deliver_safely(batch)
+            finally:
+                # El hilo no atiende peticiones: nadie más cierra su conexión.
+                connections.close_all()
+                for _ in batch:
+                    self.events.task_done()
+
+    def drain(self):
+        """
+        Entrega en el hilo actual lo que siga en la cola.
+        """
+        batch = []
+        while True:
+            try:
+                batch.append(self.events.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            deliver_safely(batch)
+            for _ in batch:
+                self.events.task_done()
+
+    def join(self):
+        self.events.join()
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = NotificationQueue(getattr(settings, "NOTIFICATION_BATCH_SECONDS", 0.5))
+                atexit.register(_queue.drain)
+    return _queue
+
+
+def notify(recipient, message, booking=None):
+    """
+    Encola una notificación para `recipient` tras el commit de la
+    transacción actual.
+    """
+    event = NotificationEvent(recipient.pk, booking.pk if booking else None, message)
+    if getattr(settings, "NOTIFICATION_QUEUE_ASYNC", True):
+        transaction.on_commit(lambda: get_queue().put(event))
+    else:
+        transaction.on_commit(lambda: deliver_safely([event]))
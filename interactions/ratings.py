@@ -0,0 +1,131 @@
+"""
+Agregados de las reseñas de cada proveedor.
+
+ServiceProvider guarda el número de reseñas, la suma de estrellas y una
+columna por cada valor de 1 a 5. Cada alta, edición o baja de una reseña
+aplica solo la diferencia con un UPDATE de F(), así que ni la búsqueda ni el
+perfil calculan AVG() sobre las reseñas. El promedio se copia a
+User.user_score y a ProviderSearchDocument en el mismo UPDATE, ya en SQL.
+
+`reconcile_ratings` recalcula todo en bloque desde Review y corrige las
+diferencias, p. ej. tras cambios concurrentes o cargas con bulk_create.
+"""
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Cast
+
+from accounts.cache import invalidate_user
+from accounts.models import ServiceProvider, User
+from searching.cache import bump_generation, bump_provider_version
+from searching.models import ProviderSearchDocument
+from .models import Review
+
+STARS = range(1, 6)
+COUNTER_FIELDS = ["rating_count", "rating_sum", *(f"rating_{stars}" for stars in STARS)]
+
+# Sin reseñas se conserva el puntaje por defecto del modelo.
+DEFAULT_SCORE = User._meta.get_field("user_score").default
+
+
+def average_expression():
+    return Case(
+        When(rating_count=0, then=Value(DEFAULT_SCORE)),
+        default=Cast("rating_sum", FloatField()) / F("rating_count"),
+        output_field=FloatField(),
+    )
+
+
+def sync_scores(provider_ids):
+    """
+    Copia el promedio de los contadores a User.user_score y al documento de
+    búsqueda de los proveedores, e invalida sus cachés.
+    """
+    provider_ids = list(provider_ids)
+    if not provider_ids:
+        return
+    averages = ServiceProvider.objects.annotate(score=average_expression())
+    User.objects.filter(service_provider_profile__in=provider_ids).update(
+        user_score=Subquery(averages.filter(user_id=OuterRef("pk")).values("score")[:1]),
+    )
+    ProviderSearchDocument.objects.filter(provider_id__in=provider_ids).update(
+        user_score=Subquery(averages.filter(pk=OuterRef("provider_id")).values("score")[:1]),
+    )
+    bump_generation()
+    for provider_id in provider_ids:
+        bump_provider_version(provider_id)
+    # Los UPDATE no envían señales: el usuario y el perfil cacheados para la
+    # sesión se invalidan aquí para que un guardado posterior no los pise.
+    for user_id in ServiceProvider.objects.filter(pk__in=provider_ids).values_list("user_id", flat=True):
+        invalidate_user(user_id)
+
+
+def apply_rating(provider_id, added=None, removed=None):
+    """
+    Aplica a los contadores del proveedor una reseña nueva (`added`), una
+    borrada (`removed`) o una edición (ambas).
+    """
+    if added == removed:
+        return
+    updates = {
+        "rating_count": F("rating_count") + int(added is not None) - int(removed is not None),
+        "rating_sum": F("rating_sum") + (added or 0) - (removed or 0),
+    }
+    if removed is not None:
+        updates[f"rating_{removed}"] = F(f"rating_{removed}") - 1
+    if added is not None:
+        updates[f"rating_{added}"] = F(f"rating_{added}") + 1
+    with transaction.atomic():
+        ServiceProvider.objects.filter(pk=provider_id).update(**updates)
+        sync_scores([provider_id])
+
+
+def actual_counters():
+    """
+    Contadores calculados desde Review con una sola consulta agrupada.
+    """
+    counters = {}
+    rows = Review.objects.order_by().values_list("provider_id", "rating").annotate(total=Count("id"))
+    for provider_id, rating, total in rows:
+        row = counters.setdefault(provider_id, dict.fromkeys(COUNTER_FIELDS, 0))
+        row["rating_count"] += total
+        row["rating_sum"] += rating * total
+        row[f"rating_{rating}"] += total
+    return counters
+
+
+def reconcile_ratings(fix=True, batch_size=500):
+    """
+    Compara los contadores guardados con los reales. Devuelve la lista de
+    diferencias (provider_id, campo, guardado, real) y, si `fix`, las corrige.
+    """
+    actual = actual_counters()
+    empty = dict.fromkeys(COUNTER_FIELDS, 0)
+    drift = []
+    to_update = []
+    stale_scores = []
+    stored_rows = ServiceProvider.objects.order_by("pk").values_list("pk", "user__user_score", *COUNTER_FIELDS)
+    for provider_id, user_score, *stored_values in stored_rows.iterator():
+        expected = actual.get(provider_id, empty)
+        provider = ServiceProvider(pk=provider_id)
+        changed = False
+        for field, stored in zip(COUNTER_FIELDS, stored_values):
+            setattr(provider, field, expected[field])
+            if stored != expected[field]:
+                drift.append((provider_id, field, stored, expected[field]))
+                changed = True
+        if changed:
+            to_update.append(provider)
+        score = provider.rating_average if expected["rating_count"] else DEFAULT_SCORE
+        if user_score is None or abs(user_score - score) > 1e-9:
+            drift.append((provider_id, "user_score", user_score, score))
+            stale_scores.append(provider_id)
+        elif changed:
+            stale_scores.append(provider_id)
+
+    if fix:
+        with transaction.atomic():
+            ServiceProvider.objects.bulk_update(to_update, COUNTER_FIELDS, batch_size=batch_size)
+            for start in range(0, len(stale_scores), batch_size):
+                sync_scores(stale_scores[start:start + batch_size])
+    return drift
@@ -0,0 +1,300 @@
+"""
+Mensajes de chat en tiempo real sobre WebSockets, sin dependencias externas.
+
+`chat_websocket` es una aplicación ASGI (enrutada en serconn_p1/asgi.py) que
+autentica al usuario con la cookie de sesión, guarda cada mensaje recibido
+como Message y reenvía al navegador los mensajes del chat. El reparto entre
+conexiones lo hace la capa configurada en REALTIME_LAYER:
+
+- InMemoryChannelLayer (por defecto) reparte dentro del proceso y sirve con
+  un solo worker.
+- Con varios workers hace falta una capa compartida (p. ej. sobre Redis
+  pub/sub) con la misma interfaz: `subscribe(group)` devuelve una
+  suscripción con `async get()` y `close()`, y `publish(group, event)` se
+  puede llamar desde código síncrono.
+
+Los mensajes se publican desde la señal post_save de Message tras el
+commit, así que el envío por POST (send_message) también llega en vivo.
+
+La misma capa alimenta los streams de Server-Sent Events (`sse_stream`) de
+los mensajes de un chat y de las notificaciones de cada usuario, servidos
+por vistas asíncronas: cada conexión espera en su cola, sin consultar la
+base de datos periódicamente.
+"""
+
+import asyncio
+import json
+import threading
+from http import cookies
+from importlib import import_module
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import transaction
+from django.db.models import Q
+from django.urls import Resolver404, resolve
+from django.utils.module_loading import import_string
+
+from .activity import mark_read
+from .models import Chat, Message
+
+
+def chat_group(chat_id):
+    return f"chat.{chat_id}"
+
+
+def notification_group(user_id):
+    return f"notifications.{user_id}"
+
+
+class Subscription:
+    """
+    Cola de eventos de un grupo para una conexión.
+    """
+
+    def __init__(self, layer, group, maxsize):
+        self.layer = layer
+        self.group = group
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, event):
+        # Un cliente que no lee no debe bloquear a los demás: se descarta lo más viejo.
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.layer.unsubscribe(self)
+
+
+class InMemoryChannelLayer:
+    """
+    Capa de un solo proceso: cada suscripción recibe los eventos en el bucle
+    de eventos en que se creó.
+    """
+
+    def __init__(self):
+        self.groups = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, group):
+        subscription = Subscription(self, group, getattr(settings, "REALTIME_QUEUE_SIZE", 100))
+        with self.lock:
+            self.groups.setdefault(group, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            members = self.groups.get(subscription.group)
+            if members is not None:
+                members.discard(subscription)
+                if not members:
+                    del self.groups[subscription.group]
+
+    def publish(self, group, event):
+        with self.lock:
+            members = list(self.groups.get(group, ()))
+        for subscription in members:
+            if not subscription.loop.is_closed():
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+
+
+_layer = None
+_layer_lock = threading.Lock()
+
+
+def get_layer():
+    global _layer
+    if _layer is None:
+        with _layer_lock:
+            if _layer is None:
+                path = getattr(settings, "REALTIME_LAYER", "interactions.realtime.InMemoryChannelLayer")
+                _layer = import_string(path)()
+    return _layer
+
+
+def message_event(message):
+    return {
+        "type": "message",
+        "id": message.pk,
+        "chat": message.chat_id,
+        "sender": message.sender_id,
+        "content": message.content,
+        "timestamp": message.timestamp.isoformat(),
+    }
+
+
+def publish_message(message):
+    get_layer().publish(chat_group(message.chat_id), message_event(message))
+
+
+def notification_event(notification):
+    return {
+        "type": "notification",
+        "id": notification.pk,
+        "message": notification.message,
+        "booking": notification.booking_id,
+        "created_at": notification.created_at.isoformat(),
+    }
+
+
+def publish_notification(notification):
+    get_layer().publish(notification_group(notification.recipient_id), notification_event(notification))
+
+
+# --- Server-Sent Events -------------------------------------------------------
+
+def sse_frame(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+RELOAD_FRAME = "event: reload\ndata: {}\n\n"
+
+
+async def sse_stream(group, backlog, last_id):
+    """
+    Genera los frames SSE de un grupo. Si hay `last_id`, primero envía lo
+    que devuelva `backlog(last_id, límite)` (los eventos posteriores, de
+    una sola consulta). La suscripción se abre antes de esa consulta para
+    no perder nada entre ambas; los eventos en vivo que ya salieron en el
+    atraso se descartan por id. Los eventos en vivo no se comparan con
+    `last_id`: se publican tras el commit desde varios hilos y uno con id
+    menor puede llegar después de otro mayor.
+
+    Si el atraso supera SSE_BACKLOG_LIMIT se envía un evento "reload" y el
+    stream termina: el cliente debe recargar en lugar de saltarse el hueco.
+    """
+    subscription = get_layer().subscribe(group)
+    heartbeat = getattr(settings, "SSE_HEARTBEAT_SECONDS", 15)
+    limit = getattr(settings, "SSE_BACKLOG_LIMIT", 100)
+    sent = set()
+    try:
+        yield "retry: 3000\n\n"
+        if last_id is not None:
+            events = await sync_to_async(backlog)(last_id, limit + 1)
+            if len(events) > limit:
+                yield RELOAD_FRAME
+                return
+            for event in events:
+                sent.add(event["id"])
+                yield sse_frame(event)
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), heartbeat)
+            except asyncio.TimeoutError:
+                # Comentario SSE: mantiene viva la conexión a través de proxies.
+                yield ": keep-alive\n\n"
+                continue
+            if event["id"] in sent:
+                continue
+            yield sse_frame(event)
+    finally:
+        subscription.close()
+
+
+# --- Conexión WebSocket -------------------------------------------------------
+
+def header(scope, name):
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return ""
+
+
+def session_user(scope):
+    """
+    Usuario de la sesión indicada en la cookie, como lo haría
+    AuthenticationMiddleware en una petición HTTP.
+    """
+    jar = cookies.SimpleCookie()
+    jar.load(header(scope, b"cookie"))
+    morsel = jar.get(settings.SESSION_COOKIE_NAME)
+    engine = import_module(settings.SESSION_ENGINE)
+    session = engine.SessionStore(morsel.value if morsel else None)
+    return get_user(SimpleNamespace(session=session))
+
+
+def same_origin(scope):
+    # Los navegadores no aplican CSRF a los WebSockets: se exige que el
+    # origen coincida con el host, como haría la protección CSRF.
+    origin = header(scope, b"origin")
+    return not origin or urlsplit(origin).netloc == header(scope, b"host")
+
+
+def participant_chat(chat_id, user):
+    if not user.is_authenticated:
+        return None
+    return Chat.objects.filter(Q(seeker=user) | Q(provider=user), pk=chat_id).first()
+
+
+def save_message(chat, user, content):
+    # El mensaje y la actividad del chat (señal post_save) se guardan juntos.
+    with transaction.atomic():
+        return Message.objects.create(chat=chat, sender=user, content=content)
+
+
+async def websocket_application(scope, receive, send):
+    """
+    Aplicación ASGI de las conexiones WebSocket: las enruta con interactions/ws_urls.py.
+    """
+    event = await receive()
+    if event["type"] != "websocket.connect":
+        return
+    try:
+        match = resolve(scope["path"], urlconf="interactions.ws_urls")
+    except Resolver404:
+        await send({"type": "websocket.close", "code": 4404})
+        return
+    await match.func(scope, receive, send, **match.kwargs)
+
+
+async def chat_websocket(scope, receive, send, chat_id):
+    """
+    Conexión a /ws/chat/<chat_id>/ de uno de los participantes del chat.
+    """
+    user = await sync_to_async(session_user)(scope)
+    chat = await sync_to_async(participant_chat)(chat_id, user) if same_origin(scope) else None
+    if chat is None:
+        await send({"type": "websocket.close", "code": 4403})
+        return
+
+    subscription = get_layer().subscribe(chat_group(chat.pk))
+    await send({"type": "websocket.accept"})
+
+    last_seen = 0
+
+    async def forward():
+        nonlocal last_seen
+        while True:
+            event = await subscription.get()
+            await send({"type": "websocket.send", "text": json.dumps(event)})
+            last_seen = max(last_seen, event.get("id", 0))
+
+    forwarder = asyncio.create_task(forward())
+    try:
+        while True:
+            event = await receive()
+            if event["type"] == "websocket.disconnect":
+                break
+            if event["type"] != "websocket.receive":
+                continue
+            try:
+                content = str(json.loads(event.get("text") or "{}").get("content", "")).strip()
+            except (ValueError, AttributeError):
+                continue
+            if content:
+                # El mensaje vuelve a esta conexión por la capa, igual que al otro participante.
+                await sync_to_async(save_message)(chat, user, content)
+    finally:
+        forwarder.cancel()
+        subscription.close()
+        # Lo recibido en vivo queda leído al cerrar, con una sola escritura.
+        if last_seen:
+            await sync_to_async(mark_read)(chat, user, last_seen)
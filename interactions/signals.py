@@ -0,0 +1,59 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Message, Notification, Review
+from .activity import record_message
+from .notifications import count_new, forget_unread
+from .ratings import apply_rating
+from .realtime import publish_message, publish_notification
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_rating(sender, instance, **kwargs):
+    # La edición aplica solo la diferencia con la calificación guardada.
+    instance._previous_rating = None
+    if instance.pk:
+        instance._previous_rating = Review.objects.filter(pk=instance.pk).values_list("rating", flat=True).first()
+
+
+@receiver(post_save, sender=Review)
+def count_review(sender, instance, **kwargs):
+    apply_rating(instance.provider_id, added=instance.rating, removed=getattr(instance, "_previous_rating", None))
+
+
+@receiver(post_delete, sender=Review)
+def uncount_review(sender, instance, **kwargs):
+    apply_rating(instance.provider_id, removed=instance.rating)
+
+
+@receiver(post_save, sender=Message)
+def count_message(sender, instance, created, **kwargs):
+    if created:
+        record_message(instance)
+
+
+@receiver(post_save, sender=Message)
+def push_message(sender, instance, created, **kwargs):
+    # Se publica tras el commit para que nadie reciba un mensaje que luego no existe.
+    if created:
+        transaction.on_commit(lambda: publish_message(instance))
+
+
+@receiver(post_save, sender=Notification)
+def push_notification(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: publish_notification(instance))
+
+
+@receiver(post_save, sender=Notification)
+def count_notification(sender, instance, created, **kwargs):
+    # Tras el commit, para no contar una notificación que se deshace.
+    if created and not instance.is_read:
+        transaction.on_commit(lambda: count_new(instance.recipient_id))
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_notification(sender, instance, **kwargs):
+    if not instance.is_read:
+        transaction.on_commit(lambda: forget_unread(instance.recipient_id))
@@ -4,11 +4,17 @@ from . import views
 urlpatterns = [
     path('chat/start/<int:provider_id>/', views.create_or_find_chat, name='create_or_find_chat'),
     path('chat/<int:chat_id>/', views.chat_view, name='chat_view'),
+    path('chat/<int:chat_id>/messages/', views.chat_messages, name='chat_messages'),
+    path('chat/<int:chat_id>/events/', views.chat_events, name='chat_events'),
     path('chat/<int:chat_id>/send/', views.send_message, name='send_message'),
     path('chat/<int:chat_id>/empty/', views.empty_chat, name='empty_chat'),
     path('chats/', views.chat_list, name='chat_list'),
     path('booking/create/<int:chat_id>/<int:service_id>/', views.create_booking, name='create_booking'),
     path('booking/cancel/<int:booking_id>/', views.cancel_booking, name='cancel_booking'),
     path('booking/respond/<int:booking_id>/<str:response>/', views.respond_to_booking, name='respond_to_booking'),
+    path('booking/complete/<int:booking_id>/', views.complete_booking, name='complete_booking'),
+    path('booking/review/<int:booking_id>/', views.review_booking, name='review_booking'),
+    path('booking/review/<int:booking_id>/delete/', views.delete_review, name='delete_review'),
     path('notifications/', views.notification_list, name='notification_list'),
+    path('notifications/events/', views.notification_events, name='notification_events'),
 ]
\ No newline at end of file
@@ -1,11 +1,29 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponseForbidden
-from .models import Chat, Message, Booking, Notification
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from datetime import datetime, timedelta
+from django.utils import timezone
+from .activity import clear_activity, mark_read
+from .forms import ReviewForm
+from .notifications import forget_unread, notify
+from .models import Chat, Message, Booking, Notification, Review
+from .realtime import (
+    chat_group, message_event, notification_event, notification_group, sse_stream,
+)
+from accounts.availability import ensure_aware, has_availability, is_available, provider_slots
 from accounts.models import User
 from searching.models import Service
-from django.db.models import Q, Count
+from searching.pagination import keyset_page
+from django.db import transaction
+from django.db.models import Q
+
+# Del mensaje más reciente al más antiguo; id desempata los del mismo instante.
+MESSAGE_ORDERING = ['-timestamp', '-id']
+# Sal propia: un cursor de la búsqueda no vale para el historial del chat.
+MESSAGE_CURSOR_SALT = 'interactions.chat.cursor'
 
 @login_required
 def create_or_find_chat(request, provider_id):
@@ -27,7 +45,9 @@ def empty_chat(request, chat_id):
         return HttpResponseForbidden("No tienes permiso para realizar esta acción.")
 
     if request.method == 'POST':
-        chat.messages.all().delete()
+        with transaction.atomic():
+            chat.messages.all().delete()
+            clear_activity(chat.id)
         messages.info(request, 'El chat ha sido vaciado.')
     
     return redirect('chat_view', chat_id=chat.id)
@@ -35,8 +55,95 @@ def empty_chat(request, chat_id):
 @login_required
 def chat_view(request, chat_id):
     chat = get_object_or_404(Chat, id=chat_id)
-    messages = chat.messages.all().order_by('timestamp')
-    return render(request, 'chat.html', {'chat': chat, 'messages': messages})
+    # Solo los mensajes más recientes; los anteriores se piden con chat_messages.
+    recent, older_cursor = keyset_page(
+        chat.messages.all(), MESSAGE_ORDERING, None, settings.CHAT_PAGE_SIZE, MESSAGE_CURSOR_SALT,
+    )
+    if recent:
+        # Abrir el chat marca como leído hasta el mensaje más reciente.
+        mark_read(chat, request.user, recent[0].pk)
+    messages = list(reversed(recent))
+    return render(request, 'chat.html', {'chat': chat, 'messages': messages, 'older_cursor': older_cursor})
+
+@login_required
+def chat_messages(request, chat_id):
+    """
+    Página de mensajes anteriores al cursor `before`, en JSON y del más
+    antiguo al más reciente. `next` es el cursor de la página siguiente.
+    """
+    chat = get_object_or_404(Chat.objects.filter(Q(seeker=request.user) | Q(provider=request.user)), id=chat_id)
+    page, next_cursor = keyset_page(
+        chat.messages.all(), MESSAGE_ORDERING, request.GET.get('before'), settings.CHAT_PAGE_SIZE,
+        MESSAGE_CURSOR_SALT,
+    )
+    return JsonResponse({
+        'messages': [message_event(message) for message in reversed(page)],
+        'next': next_cursor,
+    })
+
+def last_event_id(request):
+    """
+    Último id que ya tiene el cliente: la cabecera Last-Event-ID al
+    reconectar o el parámetro last_id en la primera conexión.
+    """
+    value = request.headers.get('Last-Event-ID') or request.GET.get('last_id')
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def streams_supported(request):
+    """
+    Los streams SSE solo se sirven bajo ASGI. Bajo WSGI (p. ej. runserver)
+    Django consumiría entero un stream que nunca termina: ocuparía un hilo
+    del servidor para siempre sin enviar nada. Se responde 204, con lo que
+    EventSource deja de reconectar.
+    """
+    return isinstance(request, ASGIRequest)
+
+
+def event_stream_response(stream):
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Evita que nginx acumule el stream en su búfer.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+async def chat_events(request, chat_id):
+    """
+    Stream SSE de los mensajes nuevos del chat. Requiere ASGI.
+    """
+    if not streams_supported(request):
+        return HttpResponse(status=204)
+    user = await request.auser()
+    chat = await Chat.objects.filter(Q(seeker=user) | Q(provider=user), pk=chat_id).afirst()
+    if chat is None:
+        raise Http404
+
+    def backlog(after, limit):
+        new_messages = chat.messages.filter(id__gt=after).order_by('id')[:limit]
+        return [message_event(message) for message in new_messages]
+
+    return event_stream_response(sse_stream(chat_group(chat.pk), backlog, last_event_id(request)))
+
+
+@login_required
+async def notification_events(request):
+    """
+    Stream SSE de las notificaciones nuevas del usuario. Requiere ASGI.
+    """
+    if not streams_supported(request):
+        return HttpResponse(status=204)
+    user = await request.auser()
+
+    def backlog(after, limit):
+        notifications = Notification.objects.filter(recipient=user, id__gt=after).order_by('id')
+        return [notification_event(notification) for notification in notifications[:limit]]
+
+    return event_stream_response(sse_stream(notification_group(user.pk), backlog, last_event_id(request)))
 
 @login_required
 def send_message(request, chat_id):
@@ -44,35 +151,59 @@ def send_message(request, chat_id):
     if request.method == 'POST':
         content = request.POST.get('content')
         if content:
-            Message.objects.create(chat=chat, sender=request.user, content=content)
+            # El mensaje y la actividad del chat (señal post_save) se guardan juntos.
+            with transaction.atomic():
+                Message.objects.create(chat=chat, sender=request.user, content=content)
     return redirect('chat_view', chat_id=chat.id)
 
 @login_required
 def create_booking(request, chat_id, service_id):
     chat = get_object_or_404(Chat, id=chat_id)
     service = get_object_or_404(Service, id=service_id)
+    booking_error = None
     if request.method == 'POST':
-        start_time = request.POST.get('start_time')
-        end_time = request.POST.get('end_time')
+        start_time = parse_booking_time(request.POST.get('start_time'))
+        end_time = parse_booking_time(request.POST.get('end_time'))
         notes = request.POST.get('notes')
-        
-        booking = Booking.objects.create( 
-            chat=chat,
-            service=service,
-            start_time=start_time,
-            end_time=end_time,
-            notes=notes
-        )
 
-        Notification.objects.create(
-            recipient=chat.provider,
-            booking=booking,
-            message=f"Tienes una nueva solicitud de servicio de {request.user.get_full_name()} para '{service.name}'."
-        )
-        messages.success(request, 'Tu solicitud ha sido enviada con éxito.')
-        return redirect('dashboard')
+        # Si el proveedor publica disponibilidad, la solicitud debe caer dentro
+        # de sus franjas efectivas (horarios, reglas semanales y excepciones).
+        if start_time is None or end_time is None or end_time <= start_time:
+            booking_error = 'Indica una fecha de inicio y una de fin válidas.'
+        elif has_availability(service.provider_id) and not is_available(service.provider_id, start_time, end_time):
+            booking_error = 'El proveedor no está disponible en ese horario.'
+        else:
+            booking = Booking.objects.create(
+                chat=chat,
+                service=service,
+                start_time=start_time,
+                end_time=end_time,
+                notes=notes
+            )
 
-    return render(request, 'booking_form.html', {'chat': chat, 'service': service})
+            notify(
+                recipient=chat.provider,
+                booking=booking,
+                message=f"Tienes una nueva solicitud de servicio de {request.user.get_full_name()} para '{service.name}'."
+            )
+            messages.success(request, 'Tu solicitud ha sido enviada con éxito.')
+            return redirect('dashboard')
+
+    now = timezone.now()
+    upcoming_slots = provider_slots([service.provider_id], now, now + timedelta(days=7))[service.provider_id]
+    return render(request, 'booking_form.html', {
+        'chat': chat,
+        'service': service,
+        'booking_error': booking_error,
+        'upcoming_slots': upcoming_slots,
+    })
+
+
+def parse_booking_time(value):
+    try:
+        return ensure_aware(datetime.fromisoformat(value))
+    except (TypeError, ValueError):
+        return None
 
 @login_required
 def respond_to_booking(request, booking_id, response):
@@ -89,7 +220,7 @@ def respond_to_booking(request, booking_id, response):
     
     booking.save()
 
-    Notification.objects.create(
+    notify(
         recipient=booking.chat.seeker,
         booking=booking,
         message=message_to_seeker
@@ -97,10 +228,64 @@ def respond_to_booking(request, booking_id, response):
     
     return redirect('dashboard')
 
+@login_required
+def complete_booking(request, booking_id):
+    # Solo el proveedor marca como completada una reserva confirmada
+    booking = get_object_or_404(Booking, id=booking_id, chat__provider=request.user, status='confirmed')
+
+    if request.method == 'POST':
+        booking.status = 'completed'
+        booking.save()
+
+        notify(
+            recipient=booking.chat.seeker,
+            booking=booking,
+            message=f"El servicio '{booking.service.name}' se marcó como completado. ¡Ya puedes calificarlo!"
+        )
+        messages.success(request, 'El servicio se marcó como completado.')
+
+    return redirect('dashboard')
+
+@login_required
+def review_booking(request, booking_id):
+    """
+    Crea o edita la reseña del cliente sobre una reserva completada.
+    """
+    booking = get_object_or_404(
+        Booking.objects.select_related('service__provider'),
+        id=booking_id, chat__seeker=request.user, status='completed',
+    )
+    review = Review.objects.filter(booking=booking).first()
+    form = ReviewForm(request.POST or None, instance=review)
+
+    if request.method == 'POST' and form.is_valid():
+        review = form.save(commit=False)
+        review.booking = booking
+        review.provider = booking.service.provider
+        review.reviewer = request.user
+        review.save()
+        messages.success(request, '¡Gracias por tu reseña!')
+        return redirect('dashboard')
+
+    return render(request, 'review_form.html', {'booking': booking, 'form': form, 'review': review})
+
+@login_required
+def delete_review(request, booking_id):
+    review = get_object_or_404(Review, booking_id=booking_id, reviewer=request.user)
+
+    if request.method == 'POST':
+        review.delete()
+        messages.info(request, 'Tu reseña ha sido eliminada.')
+
+    return redirect('dashboard')
+
 @login_required
 def notification_list(request):
     notifications = request.user.notifications.all()
-    notifications.update(is_read=True)
+    notifications.filter(is_read=False).update(is_read=True)
+    # Se borra en lugar de ponerlo a cero: una notificación creada entre el
+    # UPDATE y este punto se cuenta al recalcularlo.
+    forget_unread(request.user.pk)
     return render(request, 'notifications.html', {'notifications': notifications})
 
 @login_required
@@ -114,7 +299,7 @@ def cancel_booking(request, booking_id):
         booking.save()
 
         # Crear la notificación para el proveedor
-        Notification.objects.create(
+        notify(
             recipient=booking.chat.provider,
             booking=booking,
             message=f"El cliente {booking.chat.seeker.get_full_name()} ha cancelado la solicitud para el servicio '{booking.service.name}'."
@@ -131,13 +316,11 @@ def chat_list(request):
     """
     Muestra la lista de conversaciones activas (con mensajes) para un usuario.
     """
-    # Obtiene los chats del usuario y los filtra para mostrar solo los que no están vacíos
+    # Chats del usuario con mensajes, del más reciente al más antiguo, según
+    # la actividad que guarda cada chat (sin contar mensajes).
     chats = Chat.objects.filter(
-        Q(provider=request.user) | Q(seeker=request.user)
-    ).annotate(
-        message_count=Count('messages')
-    ).filter(
-        message_count__gt=0
-    ).order_by('-created_at')
+        Q(provider=request.user) | Q(seeker=request.user),
+        last_message_at__isnull=False,
+    ).select_related('seeker', 'provider').order_by('-last_message_at')
     
     return render(request, 'chat_list.html', {'chats': chats})
\ No newline at end of file
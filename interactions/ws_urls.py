@@ -0,0 +1,7 @@
+from django.urls import path
+
+from . import realtime
+
+urlpatterns = [
+    path('ws/chat/<int:chat_id>/', realtime.chat_websocket, name='chat_websocket'),
+]
@@ -0,0 +1,84 @@
+"""
+Serialización de resultados de búsqueda para la API JSON.
+
+Los resultados se leen de ProviderSearchDocument con `.values()`, sin
+construir instancias de modelo, y se devuelven en el orden del ranking.
+El resultado completo en NDJSON se transmite por lotes con un iterador
+síncrono bajo WSGI y uno asíncrono bajo ASGI.
+"""
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+from .models import ProviderSearchDocument
+
+# Filas que se leen por consulta al transmitir un resultado completo.
+STREAM_CHUNK_SIZE = 500
+
+RESULT_FIELDS = ("city", "verification", "user_score", "rate_min", "rate_max", "service_count")
+RESULT_ALIASES = {
+    "id": F("provider_id"),
+    "first_name": F("provider__user__first_name"),
+    "last_name": F("provider__user__last_name"),
+    "description": F("provider__description"),
+}
+
+
+def result_rows(ids, distances=None):
+    """
+    Filas de resultado de los proveedores `ids`, en ese orden. `distances`
+    es un diccionario id -> km para las búsquedas por cercanía.
+    """
+    rows = ProviderSearchDocument.objects.filter(provider_id__in=ids).values(*RESULT_FIELDS, **RESULT_ALIASES)
+    rows_by_id = {row["id"]: row for row in rows}
+    results = []
+    for provider_id in ids:
+        row = rows_by_id.get(provider_id)
+        if row is None:
+            continue
+        if distances is not None:
+            row["distance_km"] = round(distances[provider_id], 3)
+        results.append(row)
+    return results
+
+
+def ranking_chunks(ranking, with_distance=False):
+    """
+    Genera (ids, distancias) del ranking completo por lotes de STREAM_CHUNK_SIZE.
+    """
+    ids, scores = ranking
+    for start in range(0, len(ids), STREAM_CHUNK_SIZE):
+        chunk = ids[start:start + STREAM_CHUNK_SIZE].tolist()
+        distances = None
+        if with_distance:
+            # Al ordenar por cercanía el puntaje es la distancia negada.
+            distances = dict(zip(chunk, (-score for score in scores[start:start + STREAM_CHUNK_SIZE].tolist())))
+        yield chunk, distances
+
+
+def ndjson_line(row):
+    return json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+
+
+def ndjson_lines(ranking, with_distance=False):
+    """
+    Genera una línea JSON por resultado del ranking completo, leyendo las
+    filas por lotes para que la memoria no crezca con el número de resultados.
+    Para WSGI, que recorre el iterador mientras envía la respuesta.
+    """
+    for chunk, distances in ranking_chunks(ranking, with_distance):
+        for row in result_rows(chunk, distances):
+            yield ndjson_line(row)
+
+
+async def async_ndjson_lines(ranking, with_distance=False):
+    """
+    Versión asíncrona de `ndjson_lines` para ASGI: un iterador síncrono se
+    consumiría entero con sync_to_async(list) antes de enviar el primer byte.
+    """
+    for chunk, distances in ranking_chunks(ranking, with_distance):
+        for row in await sync_to_async(result_rows)(chunk, distances):
+            yield ndjson_line(row)
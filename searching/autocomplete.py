@@ -0,0 +1,238 @@
+"""
+Índice en memoria para el autocompletado del buscador.
+
+Las claves son los nombres normalizados (minúsculas, sin tildes) de
+categorías, servicios y proveedores, y cada sufijo que empieza en una
+palabra ("ana perez" y "perez"), guardadas en listas ordenadas. Un
+prefijo se resuelve con búsqueda binaria, sin consultar la base de datos.
+
+El índice se construye en la primera consulta del proceso y las señales
+de searching/signals.py lo actualizan entrada por entrada tras cada
+commit. Cada proceso tiene su propio índice: los cambios hechos en otro
+proceso se ven al reconstruirlo, cada AUTOCOMPLETE_REBUILD_SECONDS en un
+hilo de fondo mientras se sigue sirviendo el índice anterior.
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import connections
+
+from accounts.geo import normalize_text
+from accounts.models import ServiceProvider
+from .models import Service, ServiceCategory
+
+logger = logging.getLogger(__name__)
+
+CATEGORY = "category"
+SERVICE = "service"
+PROVIDER = "provider"
+
+# Orden en que se muestran los tipos de sugerencia.
+KIND_ORDER = (CATEGORY, SERVICE, PROVIDER)
+
+
+def index_keys(label):
+    """
+    Claves de un nombre: el nombre completo y cada sufijo desde una palabra.
+    """
+    words = normalize_text(label).split()
+    return {" ".join(words[position:]) for position in range(len(words))}
+
+
+class PrefixIndex:
+    """
+    Una lista ordenada de tuplas (clave, id) por tipo, con las etiquetas
+    aparte. Separar los tipos permite dejar de recorrer cada lista en cuanto
+    tiene suficientes sugerencias.
+    """
+
+    def __init__(self):
+        self.keys = {kind: [] for kind in KIND_ORDER}
+        self.labels = {}
+        self.lock = threading.Lock()
+        self.built_at = time.monotonic()
+
+    def _remove(self, kind, object_id):
+        label = self.labels.pop((kind, object_id), None)
+        if label is None:
+            return
+        keys = self.keys[kind]
+        for key in index_keys(label):
+            position = bisect_left(keys, (key, object_id))
+            if position < len(keys) and keys[position] == (key, object_id):
+                del keys[position]
+
+    def add(self, kind, object_id, label):
+        with self.lock:
+            self._remove(kind, object_id)
+            if not label:
+                return
+            self.labels[(kind, object_id)] = label
+            for key in index_keys(label):
+                insort(self.keys[kind], (key, object_id))
+
+    def remove(self, kind, object_id):
+        with self.lock:
+            self._remove(kind, object_id)
+
+    def bulk_load(self, entries):
+        """
+        Carga inicial: ordena todas las claves una sola vez.
+        """
+        keys = {kind: [] for kind in KIND_ORDER}
+        for kind, object_id, label in entries:
+            if not label:
+                continue
+            self.labels[(kind, object_id)] = label
+            keys[kind].extend((key, object_id) for key in index_keys(label))
+        for kind_keys in keys.values():
+            kind_keys.sort()
+        self.keys = keys
+
+    def suggest(self, prefix, limit):
+        """
+        Sugerencias para un prefijo, agrupadas por tipo. Varios servicios con
+        el mismo nombre se devuelven una sola vez.
+        """
+        prefix = normalize_text(prefix)
+        if not prefix:
+            return []
+        suggestions = []
+        with self.lock:
+            for kind in KIND_ORDER:
+                keys = self.keys[kind]
+                found = {}
+                position = bisect_left(keys, (prefix,))
+                while position < len(keys) and len(found) < limit - len(suggestions):
+                    key, object_id = keys[position]
+                    if not key.startswith(prefix):
+                        break
+                    label = self.labels[(kind, object_id)]
+                    found.setdefault(label if kind == SERVICE else object_id, (object_id, label))
+                    position += 1
+                suggestions.extend(
+                    {"type": kind, "id": object_id, "label": label}
+                    for object_id, label in found.values()
+                )
+        return suggestions
+
+
+def provider_label(first_name, last_name):
+    return f"{first_name} {last_name}".strip()
+
+
+def load_entries():
+    """
+    Todas las entradas del índice, en tres consultas de columnas.
+    """
+    for category_id, name in ServiceCategory.objects.values_list("pk", "name"):
+        yield CATEGORY, category_id, name
+    for service_id, name in Service.objects.values_list("pk", "name").iterator():
+        yield SERVICE, service_id, name
+    providers = ServiceProvider.objects.filter(user__user_role="service_provider").values_list(
+        "pk", "user__first_name", "user__last_name",
+    )
+    for provider_id, first_name, last_name in providers.iterator():
+        yield PROVIDER, provider_id, provider_label(first_name, last_name)
+
+
+_index = None
+_build_lock = threading.Lock()
+# Cambios recibidos mientras se construye un índice, o None si no se está
+# construyendo ninguno. Se aplican al índice nuevo antes de publicarlo.
+_pending = None
+_pending_lock = threading.Lock()
+
+
+def begin_build():
+    """
+    Empieza a registrar los cambios para un índice nuevo. Devuelve False si
+    ya hay una construcción en curso.
+    """
+    global _pending
+    with _pending_lock:
+        if _pending is not None:
+            return False
+        _pending = []
+        return True
+
+
+def build_index():
+    """
+    Construye un índice completo, le aplica los cambios llegados durante la
+    carga y lo publica reemplazando la referencia, sin bloquear las consultas.
+    """
+    global _index, _pending
+    try:
+        index = PrefixIndex()
+        index.bulk_load(load_entries())
+        with _pending_lock:
+            for kind, object_id, label in _pending or ():
+                index.add(kind, object_id, label)
+            _index = index
+    finally:
+        with _pending_lock:
+            _pending = None
+
+
+def build_in_background():
+    try:
+        build_index()
+    except Exception:
+        logger.exception("No se pudo reconstruir el índice de autocompletado")
+    finally:
+        # El hilo no atiende peticiones: nadie más cierra su conexión.
+        connections.close_all()
+
+
+def get_index():
+    """
+    Devuelve el índice del proceso. La primera vez se construye en la
+    petición; cuando pasa AUTOCOMPLETE_REBUILD_SECONDS se sigue sirviendo el
+    actual mientras un hilo construye el siguiente.
+    """
+    if _index is None:
+        with _build_lock:
+            if _index is None:
+                begin_build()
+                build_index()
+        return _index
+    index = _index
+    max_age = getattr(settings, "AUTOCOMPLETE_REBUILD_SECONDS", 600)
+    if time.monotonic() - index.built_at > max_age and begin_build():
+        threading.Thread(target=build_in_background, name="autocomplete", daemon=True).start()
+    return index
+
+
+def tracking_changes():
+    """
+    Indica si hay un índice (cargado o en construcción) al que aplicar
+    cambios. Si no, el próximo se construye completo.
+    """
+    return _index is not None or _pending is not None
+
+
+def update_entry(kind, object_id, label):
+    """
+    Añade o, sin `label`, quita una entrada del índice cargado y la registra
+    para el que se esté construyendo.
+    """
+    with _pending_lock:
+        index = _index
+        if _pending is not None:
+            _pending.append((kind, object_id, label))
+    if index is not None:
+        index.add(kind, object_id, label)
+
+
+def reset_index():
+    global _index
+    _index = None
+
+
+def suggest(prefix, limit=None):
+    return get_index().suggest(prefix, limit or getattr(settings, "AUTOCOMPLETE_LIMIT", 8))
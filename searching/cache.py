@@ -0,0 +1,156 @@
+"""
+Caché de resultados de búsqueda con invalidación por generación.
+
+Todas las claves incluyen un contador de generación que las señales de
+searching/signals.py incrementan cuando cambia un Service, ServiceProvider,
+Availability o User. Así no hace falta borrar entradas: las de generaciones
+anteriores simplemente dejan de leerse y expiran solas. Solo se usan get,
+set, add e incr, por lo que funciona con LocMemCache y FileBasedCache.
+
+Los perfiles de proveedor usan el mismo esquema con una versión propia por
+proveedor, para que un cambio en uno no invalide los demás.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import ServiceCategory
+from .search import facet_counts, filter_key, rank_search, search_page
+
+GENERATION_KEY = "search:generation"
+PROVIDER_VERSION_KEY = "provider:{}:version"
+HITS_KEY = "search:stats:hits"
+MISSES_KEY = "search:stats:misses"
+
+
+def get_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Se parte de la hora actual para que, si la clave se expulsa de la
+        # caché, la nueva generación no coincida con una antigua.
+        cache.add(GENERATION_KEY, int(time.time() * 1000), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_generation():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        get_generation()
+
+
+def provider_version(provider_id):
+    """
+    Versión del perfil de un proveedor; cambia con su usuario, servicios,
+    experiencias o disponibilidad (ver searching/signals.py).
+    """
+    key = PROVIDER_VERSION_KEY.format(provider_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_provider_version(provider_id):
+    try:
+        cache.incr(PROVIDER_VERSION_KEY.format(provider_id))
+    except ValueError:
+        provider_version(provider_id)
+
+
+def increment_counter(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def search_cache_stats():
+    """
+    Contadores de aciertos y fallos de la caché de resultados.
+    """
+    return {
+        "hits": cache.get(HITS_KEY, 0),
+        "misses": cache.get(MISSES_KEY, 0),
+        "generation": cache.get(GENERATION_KEY),
+    }
+
+
+def make_key(prefix, *parts):
+    digest = hashlib.md5(repr(parts).encode("utf-8")).hexdigest()
+    return f"search:{prefix}:{get_generation()}:{digest}"
+
+
+def cached_search(filters, cursor, page_size):
+    """
+    Devuelve (página, facetas) para los filtros normalizados. La página
+    (ver search.search_page) se cachea por filtros, cursor y tamaño; el
+    ranking completo y las facetas solo por filtros, así que pasar de página
+    no vuelve a puntuar los candidatos. La página y las facetas se leen con
+    un único get_many y el ranking, que puede tener SEARCH_MAX_CANDIDATES
+    filas, solo se lee si falta la página.
+    """
+    page_key = make_key("results", filter_key(filters), cursor, page_size)
+    facets_key = make_key("facets", filter_key(filters))
+    cached = cache.get_many([page_key, facets_key])
+
+    page = cached.get(page_key)
+    if page is None:
+        increment_counter(MISSES_KEY)
+        page = search_page(filters, cursor, page_size, cached_ranking(filters))
+        cache.set(page_key, page, settings.SEARCH_CACHE_TIMEOUT)
+    else:
+        increment_counter(HITS_KEY)
+
+    facets = cached.get(facets_key)
+    if facets is None:
+        facets = facet_counts(filters)
+        cache.set(facets_key, facets, settings.SEARCH_CACHE_TIMEOUT)
+    return page, facets
+
+
+def cached_ranking(filters):
+    """
+    Ranking completo (ids, puntajes) de los filtros, compartido con cached_search.
+    """
+    ranking_key = make_key("ranking", filter_key(filters))
+    ranking = cache.get(ranking_key)
+    if ranking is None:
+        ranking = rank_search(filters)
+        cache.set(ranking_key, ranking, settings.SEARCH_CACHE_TIMEOUT)
+    return ranking
+
+
+def search_etag(filters, *parts):
+    """
+    ETag fuerte de una respuesta de búsqueda. Depende solo de la generación
+    y de los parámetros, así que se calcula sin consultar la base de datos.
+    """
+    digest = hashlib.md5(repr((get_generation(), filter_key(filters), parts)).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def provider_profile_key(provider_id, *variant):
+    """
+    Clave del perfil renderizado; `variant` distingue versiones según quién lo ve.
+    """
+    parts = ":".join(str(part) for part in variant)
+    return f"provider:{provider_id}:profile:{provider_version(provider_id)}:{parts}"
+
+
+def cached_categories():
+    """
+    Lista de categorías para el formulario de búsqueda.
+    """
+    key = make_key("categories")
+    categories = cache.get(key)
+    if categories is None:
+        categories = list(ServiceCategory.objects.all())
+        cache.set(key, categories, settings.SEARCH_CACHE_TIMEOUT)
+    return categories
@@ -0,0 +1,103 @@
+"""
+Mantenimiento de ProviderSearchDocument, la tabla plana que consulta la búsqueda.
+"""
+
+from django.db import transaction
+
+from accounts.models import ServiceProvider
+from .models import ProviderSearchDocument
+
+DOCUMENT_UPDATE_FIELDS = [
+    "city", "verification", "user_score", "rate_min", "rate_max",
+    "service_count", "experience_months", "latitude", "longitude", "geohash",
+    "search_text", "updated_at",
+]
+
+
+def providers_for_indexing():
+    return ServiceProvider.objects.select_related("user").prefetch_related(
+        "services__category", "service_provider_experiences",
+    )
+
+
+def build_document(provider):
+    """
+    Devuelve (documento, ids de categorías) para un proveedor con su usuario
+    y sus servicios ya cargados.
+    """
+    services = list(provider.services.all())
+    rates = [service.rate for service in services]
+    user = provider.user
+    text_parts = [user.first_name, user.last_name, provider.description or ""]
+    for service in services:
+        text_parts.extend([service.name, service.description])
+        if service.category:
+            text_parts.append(service.category.name)
+    document = ProviderSearchDocument(
+        provider_id=provider.pk,
+        city=user.user_city,
+        verification=user.user_verification,
+        user_score=user.user_score,
+        rate_min=min(rates) if rates else None,
+        rate_max=max(rates) if rates else None,
+        service_count=len(services),
+        experience_months=sum(
+            experience.experience_month_time for experience in provider.service_provider_experiences.all()
+        ),
+        latitude=user.user_latitude,
+        longitude=user.user_longitude,
+        geohash=user.user_geohash,
+        search_text=" ".join(part for part in text_parts if part),
+    )
+    category_ids = {service.category_id for service in services if service.category_id}
+    return document, category_ids
+
+
+def save_documents(providers):
+    """
+    Inserta o actualiza en bloque los documentos de una lista de proveedores.
+    """
+    built = [build_document(provider) for provider in providers]
+    if not built:
+        return 0
+    Through = ProviderSearchDocument.categories.through
+    provider_ids = [document.provider_id for document, _ in built]
+    with transaction.atomic():
+        ProviderSearchDocument.objects.bulk_create(
+            [document for document, _ in built],
+            update_conflicts=True,
+            unique_fields=["provider"],
+            update_fields=DOCUMENT_UPDATE_FIELDS,
+        )
+        Through.objects.filter(providersearchdocument_id__in=provider_ids).delete()
+        Through.objects.bulk_create([
+            Through(providersearchdocument_id=document.provider_id, servicecategory_id=category_id)
+            for document, category_ids in built
+            for category_id in category_ids
+        ])
+    return len(built)
+
+
+def refresh_document(provider_id):
+    """
+    Recalcula el documento de un proveedor, o lo borra si el proveedor ya no existe.
+    """
+    provider = providers_for_indexing().filter(pk=provider_id).first()
+    if provider is None:
+        ProviderSearchDocument.objects.filter(pk=provider_id).delete()
+        return
+    save_documents([provider])
+
+
+def rebuild_documents(batch_size=500):
+    """
+    Reconstruye todos los documentos en lotes recorriendo los proveedores por
+    id. Genera el número de documentos escritos en cada lote.
+    """
+    last_id = 0
+    while True:
+        batch = list(providers_for_indexing().filter(pk__gt=last_id).order_by("pk")[:batch_size])
+        if not batch:
+            break
+        yield save_documents(batch)
+        last_id = batch[-1].pk
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from searching.cache import bump_generation
+from searching.documents import rebuild_documents
+
+
+class Command(BaseCommand):
+    help = "Reconstruye en lotes la tabla ProviderSearchDocument."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Proveedores por lote (500 por defecto).")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        total = 0
+        for written in rebuild_documents(batch_size=options["batch_size"]):
+            total += written
+            self.stdout.write(f"  {total} documentos escritos...")
+        bump_generation()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"{total} documentos reconstruidos en {elapsed:.1f} s."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import ServiceProvider
+from searching.search_index import get_backend
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de texto completo de proveedores."
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        backend.rebuild()
+        total = ServiceProvider.objects.count()
+        self.stdout.write(self.style.SUCCESS(
+            f"Índice reconstruido con {backend.__class__.__name__}: {total} proveedores."
+        ))
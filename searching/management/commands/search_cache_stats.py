@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from searching.cache import search_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Muestra los aciertos y fallos de la caché de resultados de búsqueda."
+
+    def handle(self, *args, **options):
+        stats = search_cache_stats()
+        total = stats["hits"] + stats["misses"]
+        ratio = stats["hits"] / total if total else 0
+        self.stdout.write(
+            f"Generación: {stats['generation']}\n"
+            f"Aciertos: {stats['hits']}\n"
+            f"Fallos: {stats['misses']}\n"
+            f"Tasa de aciertos: {ratio:.1%}"
+        )
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+FTS_TABLE = "searching_provider_fts"
+
+
+def create_fts_index(apps, schema_editor):
+    """
+    Crea la tabla FTS5 y la llena con los proveedores existentes.
+    Solo aplica en SQLite; otros motores usan el backend del ORM.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            "USING fts5(name, description, services, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, description, services) "
+            "SELECT sp.id, TRIM(u.first_name || ' ' || u.last_name), COALESCE(sp.description, ''), "
+            "COALESCE((SELECT GROUP_CONCAT(s.name || ' ' || s.description, ' ') "
+            "FROM searching_service s WHERE s.provider_id = sp.id), '') "
+            "FROM accounts_serviceprovider sp JOIN accounts_user u ON u.id = sp.user_id"
+        )
+
+
+def drop_fts_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_availability'),
+        ('searching', '0002_alter_servicecategory_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
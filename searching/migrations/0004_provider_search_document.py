@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_search_documents(apps, schema_editor):
+    ServiceProvider = apps.get_model('accounts', 'ServiceProvider')
+    ProviderSearchDocument = apps.get_model('searching', 'ProviderSearchDocument')
+    for provider in ServiceProvider.objects.select_related('user').prefetch_related('services__category'):
+        services = list(provider.services.all())
+        rates = [service.rate for service in services]
+        user = provider.user
+        text_parts = [user.first_name, user.last_name, provider.description or '']
+        for service in services:
+            text_parts.extend([service.name, service.description])
+            if service.category:
+                text_parts.append(service.category.name)
+        document = ProviderSearchDocument.objects.create(
+            provider=provider,
+            city=user.user_city,
+            verification=user.user_verification,
+            user_score=user.user_score,
+            rate_min=min(rates) if rates else None,
+            rate_max=max(rates) if rates else None,
+            service_count=len(services),
+            search_text=' '.join(part for part in text_parts if part),
+        )
+        document.categories.set({service.category_id for service in services if service.category_id})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_availability_bucket'),
+        ('searching', '0003_provider_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProviderSearchDocument',
+            fields=[
+                ('provider', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='accounts.serviceprovider')),
+                ('city', models.CharField(max_length=20)),
+                ('verification', models.CharField(max_length=20)),
+                ('user_score', models.FloatField(blank=True, null=True)),
+                ('rate_min', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('rate_max', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('service_count', models.PositiveIntegerField(default=0)),
+                ('search_text', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('categories', models.ManyToManyField(blank=True, related_name='+', to='searching.servicecategory')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['city', 'service_count'], name='search_doc_city_idx'), models.Index(fields=['service_count'], name='search_doc_services_idx')],
+            },
+        ),
+        migrations.RunPython(build_search_documents, migrations.RunPython.noop),
+    ]
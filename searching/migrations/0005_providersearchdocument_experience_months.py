@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:35
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def fill_experience_months(apps, schema_editor):
+    ProviderExperience = apps.get_model('accounts', 'ProviderExperience')
+    ProviderSearchDocument = apps.get_model('searching', 'ProviderSearchDocument')
+    totals = ProviderExperience.objects.values('service_provider_id').annotate(total=Sum('experience_month_time'))
+    for row in totals:
+        ProviderSearchDocument.objects.filter(pk=row['service_provider_id']).update(experience_months=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('searching', '0004_provider_search_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='providersearchdocument',
+            name='experience_months',
+            field=models.FloatField(default=0, help_text='Suma de ProviderExperience.experience_month_time'),
+        ),
+        migrations.RunPython(fill_experience_months, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:37
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_user_location(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    ProviderSearchDocument = apps.get_model('searching', 'ProviderSearchDocument')
+    provider_user = User.objects.filter(service_provider_profile=OuterRef('provider_id'))
+    ProviderSearchDocument.objects.update(
+        latitude=Subquery(provider_user.values('user_latitude')[:1]),
+        longitude=Subquery(provider_user.values('user_longitude')[:1]),
+        geohash=Subquery(provider_user.values('user_geohash')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_user_location'),
+        ('searching', '0005_providersearchdocument_experience_months'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='providersearchdocument',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=12),
+        ),
+        migrations.AddField(
+            model_name='providersearchdocument',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='providersearchdocument',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(copy_user_location, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_user_location'),
+        ('searching', '0006_providersearchdocument_location'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='providersearchdocument',
+            index=models.Index(fields=['rate_min', 'provider'], name='search_doc_rate_min_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='providersearchdocument',
+            index=models.Index(fields=['rate_max', 'provider'], name='search_doc_rate_max_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['category', 'rate', 'provider'], name='service_category_rate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['rate', 'provider'], name='service_rate_idx'),
+        ),
+    ]
@@ -22,6 +22,13 @@ class Service(models.Model):
     description = models.TextField()
     rate = models.DecimalField(max_digits=10, decimal_places=2)
 
+    class Meta:
+        indexes = [
+            # Filtro de precio dentro de una categoría y sin ella.
+            models.Index(fields=["category", "rate", "provider"], name="service_category_rate_idx"),
+            models.Index(fields=["rate", "provider"], name="service_rate_idx"),
+        ]
+
 
 class ServiceRequest(models.Model):
     STATUS_CHOICES = [
@@ -49,3 +56,38 @@ class ServiceRequest(models.Model):
     def __str__(self):
         return f"{self.seeker.username} - {self.status}"
 
+
+
+class ProviderSearchDocument(models.Model):
+    """
+    Fila desnormalizada por proveedor con todo lo que filtra la búsqueda,
+    para consultar una sola tabla en lugar de unir proveedor, usuario,
+    servicios y categorías. Se mantiene desde searching/signals.py y se
+    reconstruye con `manage.py rebuild_search_documents`.
+    """
+    provider = models.OneToOneField(ServiceProvider, on_delete=models.CASCADE, primary_key=True, related_name="search_document")
+    city = models.CharField(max_length=20)
+    verification = models.CharField(max_length=20)
+    user_score = models.FloatField(blank=True, null=True)
+    categories = models.ManyToManyField(ServiceCategory, blank=True, related_name="+")
+    rate_min = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    rate_max = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    service_count = models.PositiveIntegerField(default=0)
+    experience_months = models.FloatField(default=0, help_text="Suma de ProviderExperience.experience_month_time")
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    geohash = models.CharField(max_length=12, blank=True, default="", db_index=True)
+    search_text = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["city", "service_count"], name="search_doc_city_idx"),
+            models.Index(fields=["service_count"], name="search_doc_services_idx"),
+            # Orden por tarifa (sort=rate_asc / rate_desc).
+            models.Index(fields=["rate_min", "provider"], name="search_doc_rate_min_idx"),
+            models.Index(fields=["rate_max", "provider"], name="search_doc_rate_max_idx"),
+        ]
+
+    def __str__(self):
+        return f"Search document of provider {self.provider_id}"
@@ -0,0 +1,112 @@
+"""
+Paginación por cursor (keyset).
+
+En lugar de OFFSET, cada página se pide con los valores de la clave de
+ordenamiento del último elemento de la página anterior, así que la página
+100 cuesta lo mismo que la primera. `keyset_page` pagina querysets (el
+historial del chat); la búsqueda usa solo los cursores firmados para
+paginar su ranking ya cargado (ver ranking.ranked_page).
+"""
+
+from datetime import datetime
+from decimal import Decimal
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+def encode_cursor(values, salt):
+    """
+    Serializa los valores de la clave de ordenamiento en un token firmado.
+    Cada listado usa su propia `salt`, así que un cursor de uno no se
+    acepta en otro.
+    """
+    values = [
+        str(value) if isinstance(value, Decimal) else value.isoformat() if isinstance(value, datetime) else value
+        for value in values
+    ]
+    return signing.dumps(values, salt=salt, compress=True)
+
+
+def decode_cursor(token, salt):
+    """
+    Devuelve la lista de valores del cursor, o None si el token es inválido.
+    """
+    if not token:
+        return None
+    try:
+        values = signing.loads(token, salt=salt)
+    except signing.BadSignature:
+        return None
+    return values if isinstance(values, list) else None
+
+
+def cursor_values(model, ordering, values):
+    """
+    Convierte los valores del cursor al tipo de cada campo del modelo
+    (p. ej. el texto ISO de vuelta a datetime). Devuelve None si el número
+    de valores no coincide o alguno falta o no se puede convertir.
+    """
+    if len(values) != len(ordering):
+        return None
+    converted = []
+    for field, value in zip(ordering, values):
+        try:
+            value = model._meta.get_field(field.lstrip("-")).to_python(value)
+        except FieldDoesNotExist:
+            # Anotaciones: se usan tal cual.
+            pass
+        except (ValidationError, TypeError, ValueError):
+            return None
+        if value is None:
+            return None
+        converted.append(value)
+    return converted
+
+
+def keyset_filter(ordering, values):
+    """
+    Construye el Q que selecciona las filas posteriores al cursor para un
+    ordenamiento compuesto, p. ej. ["search_rank", "id"] o ["-rate", "id"].
+    """
+    condition = Q()
+    equal_prefix = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        condition |= equal_prefix & Q(**{f"{name}__{lookup}": value})
+        equal_prefix &= Q(**{name: value})
+    return condition
+
+
+def sort_value(item, field):
+    """
+    Valor de un campo de ordenamiento en una instancia o en una fila de .values().
+    """
+    if isinstance(item, dict):
+        return item[field]
+    return getattr(item, field)
+
+
+def keyset_page(queryset, ordering, cursor, page_size, salt):
+    """
+    Devuelve (items, next_cursor) para la página que sigue a `cursor`.
+    El último campo de `ordering` debe ser único (normalmente "id").
+    Acepta querysets de modelos o de .values() que incluyan esos campos.
+    Un cursor inválido se trata como si no hubiera cursor.
+    """
+    queryset = queryset.order_by(*ordering)
+    values = decode_cursor(cursor, salt)
+    if values is not None:
+        values = cursor_values(queryset.model, ordering, values)
+    if values is not None:
+        queryset = queryset.filter(keyset_filter(ordering, values))
+
+    # Se pide un elemento extra para saber si hay una página siguiente.
+    items = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = encode_cursor([sort_value(last, field.lstrip("-")) for field in ordering], salt)
+    return items, next_cursor
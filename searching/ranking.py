@@ -0,0 +1,186 @@
+"""
+Ranking de relevancia de los proveedores candidatos.
+
+Las columnas de los candidatos se cargan una sola vez desde
+ProviderSearchDocument y se puntúan en una pasada de NumPy; no se
+construyen instancias de modelo ni se itera en Python por proveedor.
+Cada rasgo se normaliza a [0, 1] y se pondera con SEARCH_RANKING_WEIGHTS;
+el precio se compara dentro de cada categoría.
+"""
+
+import numpy as np
+from django.conf import settings
+from django.db.models import F, Min
+
+from .models import Service
+
+CANDIDATE_COLUMNS = ("provider_id", "user_score", "verification", "experience_months")
+
+
+def lookup(keys, values, targets, default=np.nan):
+    """
+    Para cada id de `targets` devuelve su valor en (keys, values), o `default`.
+    Usa búsqueda binaria vectorizada sobre las claves ordenadas.
+    """
+    result = np.full(len(targets), default, dtype=float)
+    if len(keys) == 0:
+        return result
+    order = np.argsort(keys)
+    keys, values = keys[order], values[order]
+    positions = np.clip(np.searchsorted(keys, targets), 0, len(keys) - 1)
+    found = keys[positions] == targets
+    result[found] = values[positions[found]]
+    return result
+
+
+def load_columns(documents, text_scores=None):
+    """
+    Lee las columnas de los documentos candidatos en arrays de NumPy. Si hay
+    más de SEARCH_MAX_CANDIDATES se puntúan los primeros por relevancia de
+    texto o, sin consulta, por calificación e id, para que el corte no
+    dependa del orden en que la base de datos devuelva las filas.
+    """
+    limit = settings.SEARCH_MAX_CANDIDATES
+    rows = list(documents.order_by().values_list(*CANDIDATE_COLUMNS)[:limit + 1])
+    if len(rows) > limit:
+        if text_scores is not None:
+            # Los ids del índice de texto vienen del más al menos relevante.
+            top = text_scores[0][:limit].tolist()
+            rows = list(documents.filter(provider_id__in=top).order_by().values_list(*CANDIDATE_COLUMNS))
+        else:
+            rows = list(
+                documents.order_by(F("user_score").desc(nulls_last=True), "provider_id")
+                .values_list(*CANDIDATE_COLUMNS)[:limit]
+            )
+    if not rows:
+        return None
+    provider_ids, user_scores, verifications, experience = zip(*rows)
+    return {
+        "ids": np.array(provider_ids, dtype=np.int64),
+        "user_score": np.array(user_scores, dtype=float),
+        "verified": np.array(verifications, dtype=object) == "verificado",
+        "experience": np.array(experience, dtype=float),
+    }
+
+
+def price_scores(documents, ids, category_name=None):
+    """
+    Puntaje de precio de cada candidato: su tarifa mínima en cada categoría
+    comparada con la mediana de esa categoría entre los candidatos (1 si es
+    gratis, 0.5 en la mediana y 0 al doble o más), promediado entre sus
+    categorías. Con `category_name` solo cuenta esa categoría. Un plomero
+    se compara con plomeros, no con electricistas. Sin tarifa conocida, 0.5.
+    """
+    services = Service.objects.filter(provider_id__in=documents.values("provider_id"))
+    if category_name:
+        services = services.filter(category__name=category_name)
+    rows = list(
+        services.values("provider_id", "category_id").annotate(rate=Min("rate"))
+        .values_list("provider_id", "category_id", "rate").order_by()
+    )
+    scores = np.full(len(ids), 0.5)
+    if not rows:
+        return scores
+    providers, categories, rates = zip(*rows)
+    providers = np.array(providers, dtype=np.int64)
+    # Los servicios sin categoría forman su propio grupo.
+    categories = np.array([-1 if category is None else category for category in categories], dtype=np.int64)
+    rates = np.array(rates, dtype=float)
+
+    # Solo los candidatos puntuados entran en las medianas.
+    order = np.argsort(ids)
+    sorted_ids = ids[order]
+    positions = np.clip(np.searchsorted(sorted_ids, providers), 0, len(ids) - 1)
+    candidate = sorted_ids[positions] == providers
+    providers, categories, rates = providers[candidate], categories[candidate], rates[candidate]
+    positions = order[positions[candidate]]
+
+    row_scores = np.full(len(rates), 0.5)
+    for category in np.unique(categories):
+        in_category = categories == category
+        median = np.median(rates[in_category])
+        if median > 0:
+            row_scores[in_category] = np.clip(1.0 - (rates[in_category] / median) / 2.0, 0.0, 1.0)
+
+    totals = np.bincount(positions, weights=row_scores, minlength=len(ids))
+    counts = np.bincount(positions, minlength=len(ids))
+    priced = counts > 0
+    scores[priced] = totals[priced] / counts[priced]
+    return scores
+
+
+def score_columns(columns, text_scores=None, weights=None):
+    """
+    Puntaje combinado de cada candidato. `text_scores` es un par de arrays
+    (ids, puntajes) del índice de texto completo, o None si no hay consulta.
+    `columns["price"]` es el puntaje de precio de `price_scores`.
+    """
+    weights = weights or settings.SEARCH_RANKING_WEIGHTS
+    ids = columns["ids"]
+    total = np.zeros(len(ids))
+
+    if text_scores is not None:
+        text = lookup(text_scores[0], text_scores[1], ids, default=0.0)
+        top = text.max()
+        if top > 0:
+            total += weights["text"] * (text / top)
+
+    total += weights["score"] * np.nan_to_num(columns["user_score"] / 5.0, nan=0.5)
+    total += weights["verified"] * columns["verified"]
+    total += weights["price"] * columns["price"]
+
+    # La experiencia tiene rendimientos decrecientes: escala logarítmica.
+    experience = np.log1p(np.maximum(columns["experience"], 0.0))
+    top = experience.max()
+    if top > 0:
+        total += weights["experience"] * (experience / top)
+
+    return total
+
+
+def rank_documents(documents, category_name=None, text_scores=None):
+    """
+    Devuelve (ids, puntajes) de los documentos candidatos ordenados por
+    puntaje descendente y, a igualdad, por id ascendente.
+    """
+    columns = load_columns(documents, text_scores)
+    if columns is None:
+        return np.array([], dtype=np.int64), np.array([], dtype=float)
+    # El precio se compara dentro de cada categoría (o de la buscada).
+    columns["price"] = price_scores(documents, columns["ids"], category_name)
+    scores = score_columns(columns, text_scores)
+    order = np.lexsort((columns["ids"], -scores))
+    return columns["ids"][order], scores[order]
+
+
+def valid_cursor(cursor_values):
+    """
+    Un cursor de búsqueda es [puntaje, id]; cualquier otra cosa se ignora.
+    """
+    if cursor_values is None or len(cursor_values) != 2:
+        return False
+    cursor_score, cursor_id = cursor_values
+    return (
+        isinstance(cursor_score, (int, float)) and not isinstance(cursor_score, bool)
+        and isinstance(cursor_id, int) and not isinstance(cursor_id, bool)
+    )
+
+
+def ranked_page(ids, scores, cursor_values, page_size):
+    """
+    Página de una lista ya ordenada por (−puntaje, id) que sigue al cursor
+    (puntaje, id). Devuelve (ids de la página, sus puntajes, valores del
+    siguiente cursor).
+    """
+    start = 0
+    if valid_cursor(cursor_values) and len(ids):
+        cursor_score, cursor_id = cursor_values
+        after = (scores < cursor_score) | ((scores == cursor_score) & (ids > cursor_id))
+        start = int(np.argmax(after)) if after.any() else len(ids)
+    end = start + page_size
+    page_ids = ids[start:end].tolist()
+    page_scores = scores[start:end].tolist()
+    next_values = None
+    if end < len(ids):
+        next_values = [float(scores[end - 1]), int(ids[end - 1])]
+    return page_ids, page_scores, next_values
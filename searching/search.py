@@ -0,0 +1,329 @@
+"""
+Consulta de proveedores para la página de búsqueda.
+
+`normalize_filters` convierte los parámetros GET en un diccionario canónico
+(el mismo para dos URLs equivalentes), `rank_search` ordena los candidatos
+por relevancia y `search_page` devuelve solo los ids de una página de
+resultados, de modo que ambos se puedan cachear.
+"""
+
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+import numpy as np
+from django.conf import settings
+from django.db.models import CharField, Count, F, Max, Min, Q, Value
+from django.db.models.functions import Cast
+
+from accounts.availability import available_provider_ids, ensure_aware
+from accounts.geo import GEOHASH_UPPER, covering_prefixes, haversine_km
+from .models import ProviderSearchDocument, Service
+from .pagination import decode_cursor, encode_cursor
+from .ranking import rank_documents, ranked_page
+from .search_index import ranked_provider_ids, text_matches
+
+FILTER_FIELDS = (
+    'query', 'category', 'city', 'availability_start', 'availability_end', 'near', 'radius',
+    'min_rate', 'max_rate', 'sort',
+)
+
+# Órdenes disponibles además del de relevancia (o distancia en modo `near`).
+RATE_SORTS = ('rate_asc', 'rate_desc')
+
+# Primera tarifa que ya no cabe en Service.rate (max_digits=10, decimal_places=2).
+MAX_RATE = Decimal(10) ** 8
+
+# Sal de los cursores de resultados (ver pagination.encode_cursor).
+SEARCH_CURSOR_SALT = 'searching.pagination.cursor'
+
+
+def parse_datetime_param(value):
+    """
+    Interpreta un parámetro ISO 8601; devuelve None si falta o es inválido.
+    """
+    if not value:
+        return None
+    try:
+        return ensure_aware(datetime.fromisoformat(value))
+    except (ValueError, TypeError):
+        return None
+
+
+def parse_near_param(value):
+    """
+    Interpreta `near=lat,lon`; devuelve (lat, lon) redondeados o None.
+    """
+    try:
+        latitude, longitude = (float(part) for part in (value or '').split(','))
+    except ValueError:
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    # Cinco decimales (~1 m) bastan y permiten reutilizar la caché.
+    return round(latitude, 5), round(longitude, 5)
+
+
+def parse_radius_param(value):
+    """
+    Radio en km, entre 0.1 y SEARCH_MAX_RADIUS_KM (SEARCH_DEFAULT_RADIUS_KM si falta).
+    """
+    try:
+        radius = float(value)
+    except (TypeError, ValueError):
+        radius = settings.SEARCH_DEFAULT_RADIUS_KM
+    return round(min(max(radius, 0.1), settings.SEARCH_MAX_RADIUS_KM), 1)
+
+
+def parse_rate_param(value):
+    """
+    Tarifa no negativa con dos decimales; None si falta, es inválida o no
+    cabe en Service.rate (10 dígitos, 2 decimales).
+    """
+    try:
+        rate = Decimal(value)
+    except (TypeError, ValueError, InvalidOperation):
+        return None
+    if not rate.is_finite() or rate < 0 or rate >= MAX_RATE:
+        return None
+    rate = rate.quantize(Decimal('0.01'))
+    # El redondeo puede llevar 99999999.999 hasta MAX_RATE.
+    return rate if rate < MAX_RATE else None
+
+
+def normalize_filters(params):
+    """
+    Filtros canónicos a partir de request.GET. La consulta de texto se pasa a
+    minúsculas y se colapsan los espacios, porque el índice no distingue mayúsculas.
+    """
+    query = ' '.join((params.get('query') or '').split()).lower()
+    availability_start = parse_datetime_param(params.get('availability_start'))
+    availability_end = parse_datetime_param(params.get('availability_end'))
+    if availability_start is None or availability_end is None:
+        # La ventana de disponibilidad solo se aplica si ambos extremos son válidos.
+        availability_start = availability_end = None
+    near = parse_near_param(params.get('near'))
+    return {
+        'query': query or None,
+        'category': params.get('category') or None,
+        'city': params.get('city') or None,
+        'availability_start': availability_start,
+        'availability_end': availability_end,
+        'near': near,
+        'radius': parse_radius_param(params.get('radius')) if near else None,
+        'min_rate': parse_rate_param(params.get('min_rate')),
+        'max_rate': parse_rate_param(params.get('max_rate')),
+        'sort': params.get('sort') if params.get('sort') in RATE_SORTS else None,
+    }
+
+
+def filter_key(filters):
+    """
+    Tupla hashable y estable que identifica un conjunto de filtros.
+    """
+    return tuple(
+        value.isoformat() if isinstance(value, datetime) else value
+        for value in (filters[field] for field in FILTER_FIELDS)
+    )
+
+
+def filtered_providers(filters, text_ids=None):
+    """
+    Queryset de ProviderSearchDocument con los proveedores que cumplen los
+    filtros. Cada filtro es una condición sobre la tabla plana (o un subquery
+    indexado), así que no hay filas duplicadas. `text_ids` permite reutilizar
+    el resultado del índice de texto, que debe haberse consultado con los
+    mismos filtros.
+    """
+    providers = ProviderSearchDocument.objects.filter(service_count__gt=0)
+
+    if filters['category']:
+        # Las categorías tienen nombre único, así que el join con la tabla
+        # intermedia devuelve a lo sumo una fila por documento.
+        providers = providers.filter(categories__name=filters['category'])
+
+    if filters['city']:
+        providers = providers.filter(city=filters['city'])
+
+    if filters['availability_start'] and filters['availability_end']:
+        # Busca proveedores cuya disponibilidad contenga completamente el rango
+        # pedido. Los horarios contiguos ya vienen fusionados en el índice, así
+        # que una ventana que abarque dos horarios seguidos también se encuentra.
+        providers = providers.filter(
+            provider_id__in=available_provider_ids(filters['availability_start'], filters['availability_end'])
+        )
+
+    if filters['min_rate'] is not None or filters['max_rate'] is not None:
+        # Algún servicio (de la categoría elegida, si hay una) dentro del rango
+        # de precios: un recorrido por rango del índice (category, rate).
+        providers = providers.filter(provider_id__in=rated_services(filters).values('provider_id'))
+
+    if filters['near']:
+        # Rangos sobre el geohash indexado: solo se leen los documentos de las
+        # celdas que cubren el círculo, nunca la tabla completa.
+        in_cells = Q()
+        for prefix in covering_prefixes(*filters['near'], filters['radius']):
+            in_cells |= Q(geohash__gte=prefix, geohash__lt=prefix + GEOHASH_UPPER)
+        providers = providers.filter(in_cells)
+
+    if filters['query']:
+        # El índice de texto se consulta ya restringido a los demás filtros,
+        # para que el tope SEARCH_TEXT_MAX_MATCHES se aplique a los
+        # proveedores que de verdad cumplen todos.
+        if text_ids is None:
+            text_ids = ranked_provider_ids(filters['query'], candidates=text_candidates(providers))
+        providers = providers.filter(provider_id__in=list(text_ids))
+
+    return providers
+
+
+def text_candidates(documents):
+    return documents.order_by().values('provider_id')
+
+
+def rated_services(filters):
+    """
+    Servicios que cumplen los filtros de categoría y de precio.
+    """
+    services = Service.objects.all()
+    if filters['category']:
+        services = services.filter(category__name=filters['category'])
+    if filters['min_rate'] is not None:
+        services = services.filter(rate__gte=filters['min_rate'])
+    if filters['max_rate'] is not None:
+        services = services.filter(rate__lte=filters['max_rate'])
+    return services
+
+
+def rank_by_rate(documents, filters):
+    """
+    (ids, puntajes) ordenados por tarifa. Con categoría o rango de precios se
+    usa la tarifa de los servicios que cumplen esos filtros; si no, la del
+    documento (rate_min al ordenar ascendente, rate_max al descendente).
+    La base de datos entrega las filas ya ordenadas por índice.
+    """
+    descending = filters['sort'] == 'rate_desc'
+    if filters['category'] or filters['min_rate'] is not None or filters['max_rate'] is not None:
+        rows = (
+            rated_services(filters).filter(provider_id__in=documents.values('provider_id'))
+            .values('provider_id').annotate(sort_rate=Max('rate') if descending else Min('rate'))
+        )
+    else:
+        rows = documents.annotate(sort_rate=F('rate_max') if descending else F('rate_min'))
+    rows = rows.order_by('-sort_rate' if descending else 'sort_rate', 'provider_id')
+    rows = list(rows.values_list('provider_id', 'sort_rate')[:settings.SEARCH_MAX_CANDIDATES])
+    if not rows:
+        return np.array([], dtype=np.int64), np.array([], dtype=float)
+    ids, rates = zip(*rows)
+    rates = np.array(rates, dtype=float)
+    # El puntaje se ordena de mayor a menor, así que la tarifa ascendente se niega.
+    return np.array(ids, dtype=np.int64), rates if descending else -rates
+
+
+def rank_by_distance(documents, near, radius):
+    """
+    (ids, −distancias) de los documentos dentro del radio, del más cercano al
+    más lejano. La distancia se calcula solo para los candidatos de las
+    celdas geohash, en una pasada de NumPy.
+    """
+    rows = list(documents.order_by().values_list('provider_id', 'latitude', 'longitude')[:settings.SEARCH_MAX_CANDIDATES])
+    if not rows:
+        return np.array([], dtype=np.int64), np.array([], dtype=float)
+    ids, latitudes, longitudes = (np.array(column) for column in zip(*rows))
+    ids = ids.astype(np.int64)
+    distances = haversine_km(*near, latitudes.astype(float), longitudes.astype(float))
+    inside = distances <= radius
+    ids, distances = ids[inside], distances[inside]
+    # Se guarda −distancia como puntaje para reutilizar el orden y el cursor
+    # del ranking de relevancia (puntaje descendente, id ascendente).
+    order = np.lexsort((ids, distances))
+    return ids[order], -distances[order]
+
+
+def rank_search(filters):
+    """
+    Ordena todos los candidatos de los filtros: por tarifa si se pide
+    `sort`, por distancia en modo `near` y por relevancia en otro caso (ver
+    searching/ranking.py). Devuelve (ids, puntajes) como arrays de NumPy.
+    """
+    text_scores = None
+    text_ids = None
+    if filters['query']:
+        candidates = text_candidates(filtered_providers({**filters, 'query': None}))
+        matches = text_matches(filters['query'], candidates=candidates)
+        text_ids = [provider_id for provider_id, _ in matches]
+        text_scores = (
+            np.array(text_ids, dtype=np.int64),
+            np.array([score for _, score in matches], dtype=float),
+        )
+    documents = filtered_providers(filters, text_ids)
+    if filters['sort'] in RATE_SORTS:
+        ids, scores = rank_by_rate(documents, filters)
+        if filters['near']:
+            # Las celdas geohash cubren más que el círculo: se descartan los de fuera del radio.
+            inside = np.isin(ids, rank_by_distance(documents, filters['near'], filters['radius'])[0])
+            ids, scores = ids[inside], scores[inside]
+        return ids, scores
+    if filters['near']:
+        return rank_by_distance(documents, filters['near'], filters['radius'])
+    return rank_documents(documents, filters['category'], text_scores)
+
+
+def sorts_by_distance(filters):
+    """
+    Indica si el puntaje del ranking es la distancia negada.
+    """
+    return bool(filters['near']) and filters['sort'] not in RATE_SORTS
+
+
+def search_page(filters, cursor, page_size, ranking=None):
+    """
+    Ids de la página de resultados que sigue a `cursor`, el cursor de la
+    página siguiente y el número de resultados. Ese número es la longitud
+    del ranking ya cargado (hasta SEARCH_MAX_CANDIDATES filas), recortada a
+    SEARCH_COUNT_CAP + 1 para que la vista muestre "500+"; no es un conteo
+    aparte en la base de datos. `ranking` permite reutilizar un resultado
+    de rank_search ya calculado.
+    """
+    if ranking is None:
+        ranking = rank_search(filters)
+    ids, scores = ranking
+    page_ids, page_scores, next_values = ranked_page(ids, scores, decode_cursor(cursor, SEARCH_CURSOR_SALT), page_size)
+    return {
+        'ids': page_ids,
+        'next_cursor': encode_cursor(next_values, SEARCH_CURSOR_SALT) if next_values else None,
+        'result_count': min(len(ids), settings.SEARCH_COUNT_CAP + 1),
+        # En modo `near` el puntaje es la distancia negada.
+        'distances': dict(zip(page_ids, (-score for score in page_scores))) if sorts_by_distance(filters) else {},
+    }
+
+
+def facet_counts(filters):
+    """
+    Número de proveedores por categoría y por ciudad bajo los filtros
+    actuales, en una sola consulta agregada (UNION ALL de dos GROUP BY).
+    Cada faceta ignora su propio filtro, para que al elegir una categoría
+    sigan viéndose los conteos de las demás.
+    """
+    # Cada faceta consulta el índice de texto con sus propios filtros.
+    without_category = filtered_providers({**filters, 'category': None})
+    without_city = filtered_providers({**filters, 'city': None})
+
+    Through = ProviderSearchDocument.categories.through
+    category_counts = Through.objects.filter(
+        providersearchdocument_id__in=without_category.values('provider_id')
+    ).values(
+        facet=Value('category'), key=Cast('servicecategory_id', CharField()),
+    ).annotate(count=Count('pk')).order_by()
+    city_counts = ProviderSearchDocument.objects.filter(
+        provider_id__in=without_city.values('provider_id')
+    ).values(
+        facet=Value('city'), key=F('city'),
+    ).annotate(count=Count('pk')).order_by()
+
+    facets = {'categories': {}, 'cities': {}}
+    for row in category_counts.union(city_counts, all=True):
+        if row['facet'] == 'category':
+            facets['categories'][int(row['key'])] = row['count']
+        else:
+            facets['cities'][row['key']] = row['count']
+    return facets
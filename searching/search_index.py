@@ -0,0 +1,203 @@
+"""
+Índice de texto completo para la búsqueda de proveedores.
+
+Cada proveedor se indexa como un documento con su nombre, su descripción y
+los nombres/descripciones de sus servicios. En SQLite se usa una tabla
+virtual FTS5; en otros motores se usa un backend de respaldo basado en el ORM
+con la misma interfaz, de modo que las vistas no dependen del motor.
+"""
+
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from accounts.models import ServiceProvider
+from .models import ProviderSearchDocument
+
+FTS_TABLE = "searching_provider_fts"
+
+# Pesos de las columnas para bm25(): nombre, descripción, servicios.
+FTS_COLUMN_WEIGHTS = (10.0, 1.0, 5.0)
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(query):
+    """
+    Divide la consulta en términos alfanuméricos.
+    """
+    return TOKEN_RE.findall(query or "")
+
+
+def provider_document(provider_id):
+    """
+    Construye el documento indexable de un proveedor, o None si ya no existe.
+    """
+    provider = (
+        ServiceProvider.objects.select_related("user")
+        .prefetch_related("services")
+        .filter(pk=provider_id)
+        .first()
+    )
+    if provider is None:
+        return None
+    services = " ".join(
+        f"{service.name} {service.description}" for service in provider.services.all()
+    )
+    return {
+        "name": f"{provider.user.first_name} {provider.user.last_name}".strip(),
+        "description": provider.description or "",
+        "services": services,
+    }
+
+
+class BaseSearchBackend:
+    """
+    Interfaz común de los backends de búsqueda de proveedores.
+    """
+
+    def index_provider(self, provider_id):
+        raise NotImplementedError
+
+    def remove_provider(self, provider_id):
+        raise NotImplementedError
+
+    def rebuild(self):
+        raise NotImplementedError
+
+    def search(self, query, limit=None, candidates=None):
+        """
+        Devuelve una lista de tuplas (provider_id, score) ordenada de mayor a
+        menor relevancia. `candidates` es un queryset de ids de proveedor
+        (p. ej. `documents.values("provider_id")`) que restringe la búsqueda
+        antes de aplicar `limit`.
+        """
+        raise NotImplementedError
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    """
+    Backend que usa la tabla virtual FTS5 creada en la migración 0003.
+    El rowid de la tabla es el id del proveedor.
+    """
+
+    def index_provider(self, provider_id):
+        document = provider_document(provider_id)
+        if document is None:
+            self.remove_provider(provider_id)
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [provider_id])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, name, description, services) VALUES (%s, %s, %s, %s)",
+                [provider_id, document["name"], document["description"], document["services"]],
+            )
+
+    def remove_provider(self, provider_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [provider_id])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        for provider_id in ServiceProvider.objects.values_list("pk", flat=True).iterator():
+            self.index_provider(provider_id)
+
+    def search(self, query, limit=None, candidates=None):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        # Cada término se busca como prefijo y todos deben aparecer (AND implícito).
+        match = " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+        weights = ", ".join(str(weight) for weight in FTS_COLUMN_WEIGHTS)
+        where = f"{FTS_TABLE} MATCH %s"
+        params = [match]
+        if candidates is not None:
+            # Los filtros se aplican en la misma consulta, antes del LIMIT.
+            candidates_sql, candidates_params = candidates.query.sql_with_params()
+            where += f" AND rowid IN ({candidates_sql})"
+            params.extend(candidates_params)
+        sql = (
+            f"SELECT rowid, bm25({FTS_TABLE}, {weights}) AS score FROM {FTS_TABLE} "
+            f"WHERE {where} ORDER BY score, rowid"
+        )
+        if limit:
+            sql += " LIMIT %s"
+            params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            # bm25() devuelve valores negativos: más negativo = más relevante.
+            return [(row[0], -row[1]) for row in cursor.fetchall()]
+
+
+class ORMSearchBackend(BaseSearchBackend):
+    """
+    Backend de respaldo para motores sin FTS5. No mantiene índice propio:
+    busca todos los términos con icontains sobre la columna search_text de
+    ProviderSearchDocument, en una sola consulta sin joins. Todos los
+    resultados tienen el mismo puntaje (el número de términos).
+    """
+
+    def index_provider(self, provider_id):
+        pass
+
+    def remove_provider(self, provider_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, query, limit=None, candidates=None):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        documents = ProviderSearchDocument.objects.all()
+        if candidates is not None:
+            documents = documents.filter(provider_id__in=candidates)
+        for term in terms:
+            documents = documents.filter(search_text__icontains=term)
+        provider_ids = documents.order_by("provider_id").values_list("provider_id", flat=True)
+        if limit:
+            provider_ids = provider_ids[:limit]
+        score = float(len(terms))
+        return [(provider_id, score) for provider_id in provider_ids]
+
+
+_backend = None
+
+
+def get_backend():
+    """
+    Devuelve el backend configurado en SEARCH_BACKEND o, si no hay ninguno,
+    FTS5 cuando la tabla existe y el ORM en caso contrario.
+    """
+    global _backend
+    if _backend is None:
+        backend_path = getattr(settings, "SEARCH_BACKEND", None)
+        if backend_path:
+            _backend = import_string(backend_path)()
+        elif connection.vendor == "sqlite" and FTS_TABLE in connection.introspection.table_names():
+            _backend = SQLiteFTS5Backend()
+        else:
+            _backend = ORMSearchBackend()
+    return _backend
+
+
+def ranked_provider_ids(query, limit=None, candidates=None):
+    """
+    Ids de proveedores que coinciden con la consulta, del más al menos relevante.
+    """
+    return [provider_id for provider_id, _ in text_matches(query, limit, candidates)]
+
+
+def text_matches(query, limit=None, candidates=None):
+    """
+    Pares (provider_id, score) que coinciden con la consulta, como mucho
+    SEARCH_TEXT_MAX_MATCHES entre los `candidates` (todos si es None).
+    """
+    if limit is None:
+        limit = getattr(settings, "SEARCH_TEXT_MAX_MATCHES", 1000)
+    return get_backend().search(query, limit, candidates)
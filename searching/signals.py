@@ -0,0 +1,249 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from accounts.models import (
+    User, ServiceProvider, ProviderExperience, Availability, AvailabilityRule, AvailabilityException,
+)
+from .autocomplete import CATEGORY, PROVIDER, SERVICE, provider_label, tracking_changes, update_entry
+from .cache import bump_generation, bump_provider_version
+from .documents import providers_for_indexing, refresh_document, save_documents
+from .models import Service, ServiceCategory
+from .search_index import get_backend
+
+# Campos de User que forman parte del índice de texto o del documento de búsqueda.
+USER_INDEXED_FIELDS = {
+    "first_name", "last_name", "user_city", "user_verification", "user_score",
+    "user_latitude", "user_longitude", "user_geohash",
+}
+
+# Campos de User que forman el nombre del proveedor en el autocompletado.
+USER_NAME_FIELDS = {"first_name", "last_name", "user_role"}
+
+
+def reindex_provider(provider_id):
+    """
+    Actualiza el índice de texto completo y el documento de búsqueda de un proveedor.
+    """
+    get_backend().index_provider(provider_id)
+    refresh_document(provider_id)
+
+
+def index_new_providers(provider_ids):
+    """
+    Indexa proveedores creados con bulk_create, que no envía señales: índice
+    de texto, documentos de búsqueda, autocompletado y caché de resultados.
+    """
+    backend = get_backend()
+    for provider_id in provider_ids:
+        backend.index_provider(provider_id)
+    providers = list(providers_for_indexing().filter(pk__in=provider_ids))
+    save_documents(providers)
+    for provider in providers:
+        update_autocomplete(PROVIDER, provider.pk, provider_label(provider.user.first_name, provider.user.last_name))
+        for service in provider.services.all():
+            update_autocomplete(SERVICE, service.pk, service.name)
+    bump_generation()
+
+
+def is_cascade(sender, origin):
+    """
+    Indica si un borrado viene en cascada desde otro modelo (p. ej. al borrar
+    el proveedor). En ese caso el documento también se borra en cascada y no
+    debe recrearse.
+    """
+    if origin is None:
+        return False
+    return not isinstance(origin, sender) and getattr(origin, "model", None) is not sender
+
+
+@receiver(post_save, sender=Service)
+def reindex_service_provider(sender, instance, **kwargs):
+    reindex_provider(instance.provider_id)
+
+
+@receiver(post_delete, sender=Service)
+def reindex_deleted_service_provider(sender, instance, origin=None, **kwargs):
+    if is_cascade(sender, origin):
+        return
+    reindex_provider(instance.provider_id)
+
+
+@receiver(post_save, sender=ProviderExperience)
+def refresh_experience_provider(sender, instance, **kwargs):
+    refresh_document(instance.service_provider_id)
+
+
+@receiver(post_delete, sender=ProviderExperience)
+def refresh_deleted_experience_provider(sender, instance, origin=None, **kwargs):
+    if is_cascade(sender, origin):
+        return
+    refresh_document(instance.service_provider_id)
+
+
+@receiver(post_save, sender=ServiceProvider)
+def index_service_provider(sender, instance, **kwargs):
+    reindex_provider(instance.pk)
+
+
+@receiver(post_delete, sender=ServiceProvider)
+def remove_service_provider(sender, instance, **kwargs):
+    get_backend().remove_provider(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def reindex_user_provider(sender, instance, update_fields=None, **kwargs):
+    # Guardados parciales como el de last_login en cada inicio de sesión no
+    # cambian el documento y no deben tocar el índice.
+    if update_fields is not None and not USER_INDEXED_FIELDS & set(update_fields):
+        return
+    if not instance.is_service_provider:
+        return
+    for provider_id in ServiceProvider.objects.filter(user_id=instance.pk).values_list("pk", flat=True):
+        reindex_provider(provider_id)
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+@receiver(post_save, sender=ServiceCategory)
+@receiver(post_delete, sender=ServiceCategory)
+@receiver(post_save, sender=ServiceProvider)
+@receiver(post_delete, sender=ServiceProvider)
+@receiver(post_save, sender=ProviderExperience)
+@receiver(post_delete, sender=ProviderExperience)
+@receiver(post_save, sender=Availability)
+@receiver(post_delete, sender=Availability)
+@receiver(post_save, sender=AvailabilityRule)
+@receiver(post_delete, sender=AvailabilityRule)
+@receiver(post_save, sender=AvailabilityException)
+@receiver(post_delete, sender=AvailabilityException)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_search_cache(sender, instance, update_fields=None, **kwargs):
+    if sender is User:
+        # Los clientes no aparecen en la búsqueda, y last_login no afecta los resultados.
+        if not instance.is_service_provider:
+            return
+        if update_fields is not None and set(update_fields) <= {"last_login"}:
+            return
+    bump_generation()
+
+
+# El autocompletado se actualiza tras el commit, para que un cambio que se
+# deshace no aparezca en las sugerencias. Los valores se copian antes: tras
+# un borrado la instancia ya no tiene pk.
+
+def update_autocomplete(kind, object_id, label=None):
+    transaction.on_commit(lambda: update_entry(kind, object_id, label))
+
+
+@receiver(post_save, sender=ServiceCategory)
+def refresh_category_documents(sender, instance, created=False, **kwargs):
+    # El nombre de la categoría forma parte del search_text de los documentos.
+    if created:
+        return
+    save_documents(providers_for_indexing().filter(services__category=instance).distinct())
+
+
+@receiver(pre_delete, sender=ServiceCategory)
+def remember_category_providers(sender, instance, **kwargs):
+    # Tras el borrado los servicios ya tienen category en NULL.
+    instance._provider_ids = list(
+        Service.objects.filter(category=instance).values_list("provider_id", flat=True).distinct()
+    )
+
+
+@receiver(post_delete, sender=ServiceCategory)
+def refresh_uncategorized_documents(sender, instance, **kwargs):
+    save_documents(providers_for_indexing().filter(pk__in=getattr(instance, "_provider_ids", [])))
+
+
+@receiver(post_save, sender=ServiceCategory)
+def autocomplete_category(sender, instance, **kwargs):
+    update_autocomplete(CATEGORY, instance.pk, instance.name)
+
+
+@receiver(post_delete, sender=ServiceCategory)
+def autocomplete_deleted_category(sender, instance, **kwargs):
+    update_autocomplete(CATEGORY, instance.pk)
+
+
+@receiver(post_save, sender=Service)
+def autocomplete_service(sender, instance, **kwargs):
+    update_autocomplete(SERVICE, instance.pk, instance.name)
+
+
+@receiver(post_delete, sender=Service)
+def autocomplete_deleted_service(sender, instance, **kwargs):
+    update_autocomplete(SERVICE, instance.pk)
+
+
+@receiver(post_save, sender=ServiceProvider)
+def autocomplete_provider(sender, instance, **kwargs):
+    user = instance.user
+    if user.is_service_provider:
+        update_autocomplete(PROVIDER, instance.pk, provider_label(user.first_name, user.last_name))
+    else:
+        update_autocomplete(PROVIDER, instance.pk)
+
+
+@receiver(post_delete, sender=ServiceProvider)
+def autocomplete_deleted_provider(sender, instance, **kwargs):
+    update_autocomplete(PROVIDER, instance.pk)
+
+
+@receiver(post_save, sender=User)
+def autocomplete_user_provider(sender, instance, update_fields=None, **kwargs):
+    if not tracking_changes():
+        return
+    if update_fields is not None and not USER_NAME_FIELDS & set(update_fields):
+        return
+    for provider in ServiceProvider.objects.filter(user_id=instance.pk):
+        provider.user = instance
+        autocomplete_provider(ServiceProvider, provider)
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+@receiver(post_save, sender=Availability)
+@receiver(post_delete, sender=Availability)
+@receiver(post_save, sender=AvailabilityRule)
+@receiver(post_delete, sender=AvailabilityRule)
+@receiver(post_save, sender=AvailabilityException)
+@receiver(post_delete, sender=AvailabilityException)
+def bump_service_provider_version(sender, instance, **kwargs):
+    bump_provider_version(instance.provider_id)
+
+
+@receiver(post_save, sender=ProviderExperience)
+@receiver(post_delete, sender=ProviderExperience)
+def bump_experience_provider_version(sender, instance, **kwargs):
+    bump_provider_version(instance.service_provider_id)
+
+
+@receiver(post_save, sender=ServiceProvider)
+@receiver(post_delete, sender=ServiceProvider)
+def bump_profile_version(sender, instance, **kwargs):
+    bump_provider_version(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def bump_user_provider_version(sender, instance, update_fields=None, **kwargs):
+    if not instance.is_service_provider:
+        return
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    for provider_id in ServiceProvider.objects.filter(user_id=instance.pk).values_list("pk", flat=True):
+        bump_provider_version(provider_id)
+
+
+@receiver(post_save, sender=ServiceCategory)
+@receiver(pre_delete, sender=ServiceCategory)
+def bump_category_provider_versions(sender, instance, created=False, **kwargs):
+    # El perfil muestra el nombre de la categoría de cada servicio. Al borrar
+    # se usa pre_delete: después los servicios ya tienen category en NULL.
+    if created:
+        return
+    provider_ids = Service.objects.filter(category=instance).values_list("provider_id", flat=True).distinct()
+    for provider_id in provider_ids:
+        bump_provider_version(provider_id)
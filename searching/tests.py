@@ -1,3 +1,71 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Availability, ProviderExperience, ServiceProvider, User
+from .models import Service, ServiceCategory
+
+
+class ProviderDetailViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User(
+            email="proveedor@example.com", first_name="Ana", last_name="Pérez",
+            user_role="service_provider", user_city="medellin", user_birthdate=date(1990, 1, 1),
+            user_phone="3000000000", user_address="Calle 10, El Poblado",
+        )
+        user.set_password("clave-segura")
+        user.save()
+        self.provider = ServiceProvider.objects.create(user=user, description="Plomera")
+        category = ServiceCategory.objects.create(name="Hogar")
+        start = timezone.now() + timedelta(days=1)
+        for index in range(5):
+            Service.objects.create(
+                provider=self.provider, category=category, name=f"Servicio {index}",
+                description="Descripción", rate=Decimal("50000"),
+            )
+            ProviderExperience.objects.create(
+                service_provider=self.provider, experience_name=f"Experiencia {index}", experience_month_time=12,
+            )
+            Availability.objects.create(
+                provider=self.provider, start_time=start + timedelta(days=index),
+                end_time=start + timedelta(days=index, hours=2),
+            )
+        self.url = reverse("provider_detail", args=[self.provider.pk])
+
+    def test_constant_query_count(self):
+        # Proveedor con usuario, servicios con categoría, experiencias y
+        # disponibilidad (horarios puntuales, reglas semanales y excepciones).
+        with self.assertNumQueries(6):
+            response = self.client.get(self.url)
+        self.assertContains(response, "Servicio 4")
+        self.assertContains(response, "Experiencia 4")
+
+    def test_cached_profile_costs_no_queries(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, "Ana Pérez")
+
+    def test_cached_profile_hides_past_slots(self):
+        self.client.get(self.url)
+        later = timezone.now() + timedelta(days=1, hours=3)
+        with mock.patch("searching.views.timezone.now", return_value=later):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.context["upcoming_availability"]), 4)
 
-# Create your tests here.
+    def test_changes_invalidate_cached_profile(self):
+        self.client.get(self.url)
+        Service.objects.create(
+            provider=self.provider, name="Servicio nuevo", description="Descripción", rate=Decimal("10000"),
+        )
+        self.assertContains(self.client.get(self.url), "Servicio nuevo")
+        user = self.provider.user
+        user.first_name = "Andrea"
+        user.save()
+        self.assertContains(self.client.get(self.url), "Andrea Pérez")
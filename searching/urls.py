@@ -3,6 +3,8 @@ from . import views
 
 urlpatterns = [
     path('', views.service_search_view, name='service_search'),
+    path('api/', views.search_api_view, name='search_api'),
+    path('autocomplete/', views.autocomplete_view, name='search_autocomplete'),
     path('add-service/', views.add_service, name='add_service'),
     path('provider/<int:provider_id>/', views.provider_detail_view, name='provider_detail'),
 ]
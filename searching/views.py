@@ -1,13 +1,29 @@
-from django.shortcuts import render, get_object_or_404, redirect
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
-from django.http import Http404
-from .models import ServiceCategory, Service
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Prefetch
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.http import Http404, JsonResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from .models import Service
+from .autocomplete import suggest, CATEGORY, PROVIDER
+from .api import async_ndjson_lines, ndjson_lines, result_rows
+from .cache import cached_search, cached_categories, cached_ranking, provider_profile_key, search_etag
+from .search import normalize_filters, sorts_by_distance
+from accounts.availability import provider_slots
+from accounts.cache import get_provider_profile
 from accounts.models import ServiceProvider
 from interactions.models import Booking
 from .forms import ServiceForm
 from accounts.models import User
-from datetime import datetime
 
 @login_required
 def dashboard_view(request):
@@ -16,12 +32,16 @@ def dashboard_view(request):
     """
     if request.user.is_service_seeker:
         # Busca las reservas donde el usuario es el solicitante
-        bookings = Booking.objects.filter(chat__seeker=request.user).order_by('-start_time')
+        bookings = Booking.objects.filter(chat__seeker=request.user).select_related(
+            'service', 'chat__provider', 'review',
+        ).order_by('-start_time')
         return render(request, 'seeker_dashboard.html', {'bookings': bookings})
     
     elif request.user.is_service_provider:
         # Busca las reservas donde el usuario es el proveedor
-        bookings = Booking.objects.filter(chat__provider=request.user).order_by('-start_time')
+        bookings = Booking.objects.filter(chat__provider=request.user).select_related(
+            'service', 'chat__seeker', 'review',
+        ).order_by('-start_time')
         return render(request, 'provider_dashboard.html', {'bookings': bookings})
 
     # Si no tiene un rol definido, lo redirige a la búsqueda
@@ -30,79 +50,203 @@ def dashboard_view(request):
 def service_search_view(request):
     """
     Vista principal para la búsqueda de servicios.
+    Los resultados se paginan por cursor sobre una clave de orden estable y se
+    cachean por filtros normalizados (ver searching/cache.py).
     """
-    categories = ServiceCategory.objects.all()
-    providers = ServiceProvider.objects.select_related("user").filter(services__isnull=False).distinct()
-    
-    query = request.GET.get('query')
-    category = request.GET.get('category')
-    city = request.GET.get('city')
-    availability_start_str = request.GET.get('availability_start')
-    availability_end_str = request.GET.get('availability_end')
-
-    if query:
-        providers = providers.filter(
-            Q(description__icontains=query) |  
-            Q(user__first_name__icontains=query) |
-            Q(user__last_name__icontains=query) |
-            Q(services__name__icontains=query) |
-            Q(services__description__icontains=query)
-        ).distinct()
-
-    if category:
-        providers = providers.filter(services__category__name=category).distinct()
-
-    if city:
-        providers = providers.filter(user__user_city=city).distinct()
-
-    if availability_start_str and availability_end_str:
-        try:
-            availability_start = datetime.fromisoformat(availability_start_str)
-            availability_end = datetime.fromisoformat(availability_end_str)
-
-            # Lógica de filtro corregida: Busca proveedores cuya disponibilidad
-            # contenga completamente el rango de tiempo solicitado.
-            providers = providers.filter(
-                availability__start_time__lte=availability_start,
-                availability__end_time__gte=availability_end
-            ).distinct()
-        except (ValueError, TypeError):
-            # Ignorar si el formato de fecha es inválido
-            pass
+    filters = normalize_filters(request.GET)
+    result, facets = cached_search(filters, request.GET.get('cursor'), get_page_size(request))
+
+    providers_by_id = ServiceProvider.objects.select_related('user').prefetch_related('services').in_bulk(result['ids'])
+    providers = [providers_by_id[provider_id] for provider_id in result['ids'] if provider_id in providers_by_id]
+    for provider in providers:
+        provider.distance_km = result['distances'].get(provider.pk)
+
+    # El enlace a la página siguiente conserva todos los filtros actuales.
+    next_page_query = None
+    if result['next_cursor']:
+        params = request.GET.copy()
+        params['cursor'] = result['next_cursor']
+        next_page_query = params.urlencode()
+    first_page_query = None
+    if request.GET.get('cursor'):
+        params = request.GET.copy()
+        del params['cursor']
+        first_page_query = params.urlencode()
+
+    count_cap = settings.SEARCH_COUNT_CAP
+    # Conteo de proveedores por categoría y ciudad para las opciones del filtro.
+    categories = [
+        (category, facets['categories'].get(category.pk, 0)) for category in cached_categories()
+    ]
+    cities = [
+        (city_value, city_name, facets['cities'].get(city_value, 0)) for city_value, city_name in User.CITY_CHOICES
+    ]
 
     context = {
         'categories': categories,
         'providers': providers,
-        'query': query,
-        'selected_category': category,
-        'selected_city': city,
-        'cities': User.CITY_CHOICES,
-        'availability_start': availability_start_str,
-        'availability_end': availability_end_str,
+        'query': request.GET.get('query'),
+        'selected_category': filters['category'],
+        'selected_city': filters['city'],
+        'cities': cities,
+        'availability_start': request.GET.get('availability_start'),
+        'availability_end': request.GET.get('availability_end'),
+        'near': request.GET.get('near') if filters['near'] else None,
+        'radius': filters['radius'] or settings.SEARCH_DEFAULT_RADIUS_KM,
+        'radius_choices': [1, 2, 5, 10, 20],
+        'min_rate': filters['min_rate'],
+        'max_rate': filters['max_rate'],
+        'selected_sort': filters['sort'],
+        'sort_choices': [('rate_asc', 'Precio: menor a mayor'), ('rate_desc', 'Precio: mayor a menor')],
+        'result_count': min(result['result_count'], count_cap),
+        'result_count_capped': result['result_count'] > count_cap,
+        'next_page_query': next_page_query,
+        'first_page_query': first_page_query,
     }
     return render(request, 'service_search.html', context)
 
 
+def get_page_size(request):
+    """
+    Tamaño de página pedido en `page_size`, limitado por SEARCH_MAX_PAGE_SIZE.
+    """
+    try:
+        page_size = int(request.GET.get('page_size', settings.SEARCH_PAGE_SIZE))
+    except (TypeError, ValueError):
+        page_size = settings.SEARCH_PAGE_SIZE
+    return max(1, min(page_size, settings.SEARCH_MAX_PAGE_SIZE))
+
+
+def search_api_view(request):
+    """
+    Versión JSON de service_search_view con los mismos filtros, para el
+    cliente móvil. Con `format=ndjson` (o Accept: application/x-ndjson)
+    transmite todos los resultados, uno por línea, en lugar de una página.
+    Responde 304 si el ETag de If-None-Match sigue vigente, sin ejecutar la búsqueda.
+    """
+    filters = normalize_filters(request.GET)
+    stream = (
+        request.GET.get('format') == 'ndjson'
+        or 'application/x-ndjson' in request.headers.get('Accept', '')
+    )
+    cursor = request.GET.get('cursor')
+    page_size = get_page_size(request)
+    etag = search_etag(filters, stream, None if stream else cursor, None if stream else page_size)
+
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    elif stream:
+        # Cada servidor necesita su tipo de iterador para transmitir sin acumular.
+        lines = async_ndjson_lines if isinstance(request, ASGIRequest) else ndjson_lines
+        response = StreamingHttpResponse(
+            lines(cached_ranking(filters), sorts_by_distance(filters)), content_type='application/x-ndjson',
+        )
+    else:
+        result, facets = cached_search(filters, cursor, page_size)
+        count_cap = settings.SEARCH_COUNT_CAP
+        response = JsonResponse({
+            'results': result_rows(result['ids'], result['distances'] if sorts_by_distance(filters) else None),
+            'next_cursor': result['next_cursor'],
+            'result_count': min(result['result_count'], count_cap),
+            'result_count_capped': result['result_count'] > count_cap,
+            'facets': {
+                'categories': {category.name: facets['categories'].get(category.pk, 0) for category in cached_categories()},
+                'cities': facets['cities'],
+            },
+        })
+    response['ETag'] = etag
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+def autocomplete_view(request):
+    """
+    Sugerencias para el cuadro de búsqueda a partir del prefijo `q`.
+    Se responden desde el índice en memoria, sin consultar la base de datos.
+    """
+    suggestions = suggest(request.GET.get('q', '')[:100])
+    for suggestion in suggestions:
+        if suggestion['type'] == CATEGORY:
+            suggestion['url'] = reverse('service_search') + '?' + urlencode({'category': suggestion['label']})
+        elif suggestion['type'] == PROVIDER:
+            suggestion['url'] = reverse('provider_detail', args=[suggestion['id']])
+        else:
+            suggestion['url'] = reverse('service_search') + '?' + urlencode({'query': suggestion['label']})
+    return JsonResponse({'suggestions': suggestions})
+
+
 def provider_detail_view(request, provider_id):
     """
     Vista para mostrar el perfil detallado de un proveedor.
+    El perfil se renderiza una vez por versión del proveedor (ver
+    searching/cache.py) y se sirve desde la caché sin consultar la base de datos.
+    La disponibilidad depende de la hora, así que se guardan las franjas y
+    se filtran en cada petición.
     """
-    try:
-        provider = get_object_or_404(ServiceProvider, pk=provider_id)
-    except Http404:
-        return render(request, '404.html')
+    show_chat = request.user.is_authenticated and request.user.is_service_seeker
+    key = provider_profile_key(provider_id, show_chat)
+    profile = cache.get(key)
+    if profile is None:
+        provider = load_provider_profile(provider_id)
+        if provider is None:
+            return render(request, '404.html')
+        profile = {
+            'title': provider.user.get_full_name(),
+            'html': render_to_string('provider_profile.html', {
+                'provider': provider,
+                'services_offered': provider.services.all(),
+                'experiences': provider.service_provider_experiences.all(),
+                'show_chat': show_chat,
+            }),
+            'slots': availability_horizon(provider.pk),
+        }
+        cache.set(key, profile, settings.PROVIDER_PROFILE_CACHE_TIMEOUT)
+    return render(request, 'provider_detail.html', {
+        'profile': profile,
+        'upcoming_availability': upcoming_slots(profile['slots']),
+    })
 
-    services_offered = Service.objects.filter(provider=provider)
 
-    context = {
-        'provider': provider,
-        'services_offered': services_offered,
-    }
-    return render(request, 'provider_detail.html', context)
+def load_provider_profile(provider_id):
+    """
+    Proveedor con todo lo que muestra su perfil, en un número fijo de consultas.
+    """
+    return (
+        ServiceProvider.objects.select_related('user')
+        .prefetch_related(
+            Prefetch('services', queryset=Service.objects.select_related('category').order_by('pk')),
+            'service_provider_experiences',
+        )
+        .filter(pk=provider_id)
+        .first()
+    )
+
+
+def availability_horizon(provider_id):
+    """
+    Franjas efectivas del proveedor (horarios puntuales y reglas semanales,
+    menos excepciones) en las dos semanas siguientes.
+    """
+    now = timezone.now()
+    return provider_slots([provider_id], now, now + timedelta(days=14))[provider_id]
+
+
+def upcoming_slots(slots):
+    """
+    Las franjas de `slots` que aún no han terminado, recortadas a la hora actual.
+    """
+    now = timezone.now()
+    upcoming = [
+        {'start_time': max(start, now), 'end_time': end}
+        for start, end in slots if end > now
+    ]
+    return upcoming[:settings.PROVIDER_PROFILE_AVAILABILITY_SLOTS]
 
 @login_required
 def add_service(request):
-    provider = get_object_or_404(ServiceProvider, user=request.user)
+    provider = get_provider_profile(request.user)
+    if provider is None:
+        raise Http404("No eres proveedor.")
     if request.method == "POST":
         form = ServiceForm(request.POST)
         if form.is_valid():
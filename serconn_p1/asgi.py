@@ -13,4 +13,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "serconn_p1.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Se importa después de configurar Django: usa los modelos.
+from interactions.realtime import websocket_application  # noqa: E402
+
+
+async def application(scope, receive, send):
+    # HTTP lo atiende Django; los WebSockets del chat, interactions/realtime.py.
+    if scope["type"] == "websocket":
+        await websocket_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
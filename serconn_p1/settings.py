@@ -20,6 +20,18 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Los archivos subidos se guardan una sola vez por contenido (ver accounts/storage.py).
+STORAGES = {
+    "default": {
+        "BACKEND": "accounts.storage.ContentAddressedStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+# Horas que se conserva un blob sin referencias antes de que collect_blobs lo borre.
+BLOB_GC_GRACE_HOURS = 24
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.0/howto/deployment/checklist/
@@ -130,6 +142,40 @@ USE_I18N = True
 USE_TZ = True
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Debe ser compartida entre procesos: guarda las sesiones, el usuario de cada
+# petición y contadores (la comprobación accounts.E001 rechaza LocMemCache).
+# En disco sirve para desarrollo en una sola máquina; en producción conviene
+# Redis o Memcached, que además incrementan los contadores de forma atómica
+# (con FileBasedCache el contador de notificaciones se recuenta al cambiar).
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / ".cache",
+    }
+}
+
+
+# Sesiones en caché con escritura en la base de datos: en cada petición la
+# sesión se lee de la caché y solo se consulta la tabla si no está.
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+
+# El usuario de la sesión se lee de la caché (ver accounts/cache.py).
+# ModelBackend se conserva para las sesiones iniciadas antes del cambio.
+AUTHENTICATION_BACKENDS = [
+    "accounts.backends.CachedModelBackend",
+    "django.contrib.auth.backends.ModelBackend",
+]
+# Segundos que se conservan en caché el usuario y su perfil de proveedor (se
+# invalidan antes al guardarlos).
+AUTH_USER_CACHE_TIMEOUT = 300
+# Segundos que se conserva el contador de notificaciones no leídas (ver
+# interactions/notifications.py); al expirar se recuenta en la base de datos.
+NOTIFICATION_COUNT_CACHE_TIMEOUT = 300
+
+
 # Static files (CSS, JavaScript, Images)
 STATICFILES_DIRS = [
     BASE_DIR / 'static',
@@ -143,4 +189,61 @@ STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # Configuración de Correo Electrónico para Desarrollo
-EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
\ No newline at end of file
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
+# Notificaciones (ver interactions/notifications.py): se entregan en un hilo
+# de fondo (False las entrega en la misma petición tras el commit), juntando
+# los eventos que llegan en NOTIFICATION_BATCH_SECONDS, y cada lote envía un
+# correo de resumen por destinatario.
+NOTIFICATION_QUEUE_ASYNC = True
+NOTIFICATION_BATCH_SECONDS = 0.5
+NOTIFICATION_EMAIL_DIGESTS = True
+
+# Búsqueda de proveedores
+# SEARCH_BACKEND permite forzar un backend de texto completo
+# (p. ej. "searching.search_index.ORMSearchBackend"); por defecto se usa FTS5 en SQLite.
+# Máximo de coincidencias del índice de texto y de candidatos que se ordenan por relevancia.
+SEARCH_TEXT_MAX_MATCHES = 1000
+SEARCH_MAX_CANDIDATES = 50000
+SEARCH_PAGE_SIZE = 12
+SEARCH_MAX_PAGE_SIZE = 60
+# Máximo de resultados que se muestra; por encima se muestra "500+". El
+# número sale del ranking ya cargado, no de un conteo en la base de datos.
+SEARCH_COUNT_CAP = 500
+# Segundos que se conserva una página de resultados cacheada (se invalida antes
+# si cambian proveedores, servicios, disponibilidad o usuarios).
+SEARCH_CACHE_TIMEOUT = 300
+# Pesos de cada rasgo en el ranking de relevancia (ver searching/ranking.py).
+SEARCH_RANKING_WEIGHTS = {
+    "text": 3.0,
+    "score": 2.0,
+    "verified": 1.0,
+    "price": 1.0,
+    "experience": 1.0,
+}
+# Búsqueda por cercanía (near=lat,lon&radius=km).
+SEARCH_DEFAULT_RADIUS_KM = 5
+SEARCH_MAX_RADIUS_KM = 50
+# Autocompletado: máximo de sugerencias y segundos tras los que cada proceso
+# reconstruye su índice en memoria (para ver cambios hechos en otros procesos).
+AUTOCOMPLETE_LIMIT = 8
+AUTOCOMPLETE_REBUILD_SECONDS = 600
+# Perfil de proveedor: segundos que se conserva el HTML renderizado (se
+# invalida antes si cambia el proveedor) y franjas de disponibilidad mostradas.
+PROVIDER_PROFILE_CACHE_TIMEOUT = 300
+PROVIDER_PROFILE_AVAILABILITY_SLOTS = 10
+# Miniaturas de fotos de perfil (ver accounts/images.py): hilos del pool y si
+# se generan en segundo plano (False las genera en la misma petición).
+IMAGE_PIPELINE_WORKERS = 2
+IMAGE_PIPELINE_ASYNC = True
+# Chat en tiempo real (ver interactions/realtime.py): capa que reparte los
+# mensajes entre conexiones y eventos pendientes por conexión. La capa en
+# memoria sirve con un solo proceso; con varios workers se necesita una compartida.
+REALTIME_LAYER = "interactions.realtime.InMemoryChannelLayer"
+REALTIME_QUEUE_SIZE = 100
+# Streams SSE de mensajes y notificaciones: segundos entre keep-alives y
+# máximo de eventos atrasados que se envían al reconectar.
+SSE_HEARTBEAT_SECONDS = 15
+SSE_BACKLOG_LIMIT = 100
+# Mensajes que muestra el chat al abrirlo y que trae cada "cargar anteriores".
+CHAT_PAGE_SIZE = 50